@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.api.deps import get_db
 from app.db import repositories
-from app.models.schemas import ProductCreate, PriceUpdate
+from app.domain.catalog import add_to_catalog, invalidate_catalog
+from app.domain.rfp_scoring import refresh_scores_for_specs
+from app.models.schemas import BulkRowError, BulkUploadResult, ProductCreate, PriceUpdate
+from app.services.bulk_io import BulkFormat, BulkReport, RecordParser, detect_format
+from app.services.product_import import ProductImport
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
@@ -18,6 +24,9 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
         # Pydantic -> Dict
         data = product.model_dump()
         new_prod = repositories.create_product(db, data)
+        add_to_catalog([new_prod])
+        refresh_scores_for_specs(db, [(new_prod.conductor, new_prod.insulation)])
+        db.commit()
         return {
             "msg": "Product created successfully",
             "sku": new_prod.sku,
@@ -30,6 +39,31 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/products/bulk", response_model=BulkUploadResult)
+async def bulk_create_products(
+    request: Request,
+    format: Optional[BulkFormat] = Query(None, description="Body format; default from Content-Type (text/csv, else JSONL)."),
+    db: Session = Depends(get_db),
+):
+    """
+    Imports many products (ProductCreate rows, optional `unit_price`) from a
+    streamed CSV or JSONL body in one transaction. Invalid rows and SKUs
+    that already exist are skipped and reported. Affected RFP scores are
+    refreshed once, before the commit; the catalog snapshot once, after it.
+    """
+    parser = RecordParser(ProductCreate, detect_format(request.headers.get("content-type"), format))
+    importer = ProductImport(parser.report)
+    try:
+        async for batch in parser.abatches(request.stream()):
+            await run_in_threadpool(importer.import_batch, db, batch)
+        await run_in_threadpool(importer.refresh_scores, db)
+        await run_in_threadpool(db.commit)
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=500, detail=str(e))
+    importer.finish()
+    return _bulk_result(parser.report, importer.imported)
+
 @router.post("/prices")
 def update_price(price_update: PriceUpdate, db: Session = Depends(get_db)):
     """
@@ -38,7 +72,42 @@ def update_price(price_update: PriceUpdate, db: Session = Depends(get_db)):
     try:
         updated = repositories.update_sku_price(db, price_update.sku, price_update.unit_price)
         db.commit()
+        invalidate_catalog()
         return {"msg": "Price updated", "sku": updated.sku, "unit_price": updated.unit_price}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/prices/bulk", response_model=BulkUploadResult)
+async def bulk_update_prices(
+    request: Request,
+    format: Optional[BulkFormat] = Query(None, description="Body format; default from Content-Type (text/csv, else JSONL)."),
+    db: Session = Depends(get_db),
+):
+    """
+    Upserts many SKU prices from a streamed CSV (`sku,unit_price` header) or
+    JSONL body. Rows are written in batches inside one transaction; invalid
+    rows are skipped and reported. For a SKU listed twice the last row wins.
+    """
+    parser = RecordParser(PriceUpdate, detect_format(request.headers.get("content-type"), format))
+    applied = 0
+    try:
+        async for batch in parser.abatches(request.stream()):
+            prices = {row.sku: row.unit_price for _, row in batch}
+            applied += await run_in_threadpool(repositories.upsert_sku_prices, db, prices)
+        await run_in_threadpool(db.commit)
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return _bulk_result(parser.report, applied)
+
+
+def _bulk_result(report: BulkReport, applied: int) -> BulkUploadResult:
+    return BulkUploadResult(
+        received=report.received,
+        applied=applied,
+        rejected=report.rejected,
+        errors=[BulkRowError(row=err.row, error=err.error) for err in sorted(report.errors, key=lambda e: e.row)],
+    )
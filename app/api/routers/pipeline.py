@@ -1,17 +1,20 @@
-from typing import List
-from fastapi import APIRouter, Depends, Query
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_main_agent
 from app.db.session import get_db
 from app.domain.agents.main_agent import MainAgent
-from app.models.schemas import FullRFPResponse
+from app.db import models, repositories
+from app.models.schemas import FullRFPResponse, PipelineJobRequest, PipelineJobStatus, TestCostAllocation
+from app.services.job_runner import JobRunner, QueueFull, get_job_runner
 
 router = APIRouter(prefix="/pipeline", tags=["pipeline"])
 
 
 @router.get("/run", response_model=FullRFPResponse)
-def run_full_pipeline(
+async def run_full_pipeline(
     urls: List[str] = Query(
         default=[
             "http://test.com",
@@ -19,7 +22,79 @@ def run_full_pipeline(
         description="List of URLs that may contain RFP listings.",
     ),
     live_mode: bool = Query(False, description="Enable live scraping instead of DB mock data."),
+    top_k: int = Query(3, ge=1, le=50, description="Number of candidate SKUs to keep per line item."),
+    test_allocation: Optional[TestCostAllocation] = Query(
+        None, description="How RFP test charges are applied to pricing rows (default from settings)."
+    ),
+    as_of: Optional[date] = Query(None, description="Price SKUs as they were on this date (default: current prices)."),
+    db: Session = Depends(get_db),
+    main_agent: MainAgent = Depends(get_main_agent),
+):
+    return await main_agent.run_full_pipeline_async(
+        db, urls, live_mode=live_mode, top_k=top_k, test_allocation=test_allocation, as_of=as_of
+    )
+
+
+@router.get("/run-top", response_model=List[FullRFPResponse])
+def run_top_n_pipeline(
+    urls: List[str] = Query(
+        default=[
+            "http://test.com",
+        ],
+        description="List of URLs that may contain RFP listings.",
+    ),
+    top_n: int = Query(5, ge=1, le=20, description="Number of best-ranked RFPs to respond to."),
+    live_mode: bool = Query(False, description="Enable live scraping instead of DB mock data."),
+    top_k: int = Query(3, ge=1, le=50, description="Number of candidate SKUs to keep per line item."),
+    test_allocation: Optional[TestCostAllocation] = Query(
+        None, description="How RFP test charges are applied to pricing rows (default from settings)."
+    ),
+    as_of: Optional[date] = Query(None, description="Price SKUs as they were on this date (default: current prices)."),
     db: Session = Depends(get_db),
     main_agent: MainAgent = Depends(get_main_agent),
 ):
-    return main_agent.run_full_pipeline(db, urls, live_mode=live_mode)
+    """Technical and pricing stages of the top N RFPs run concurrently; responses in rank order."""
+    return main_agent.run_top_n_pipeline(
+        db, urls, top_n, live_mode=live_mode, top_k=top_k, test_allocation=test_allocation, as_of=as_of
+    )
+
+
+def _job_status(job: models.PipelineJob) -> PipelineJobStatus:
+    return PipelineJobStatus.model_validate(job, from_attributes=True)
+
+
+@router.post("/jobs", response_model=PipelineJobStatus, status_code=202)
+def submit_pipeline_job(
+    request: PipelineJobRequest,
+    db: Session = Depends(get_db),
+    runner: JobRunner = Depends(get_job_runner),
+):
+    """Queues a /pipeline/run (e.g. in live mode, which can take minutes); poll GET /pipeline/jobs/{id}."""
+    try:
+        job = runner.submit(db, request)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return _job_status(job)
+
+
+@router.get("/jobs/{job_id}", response_model=PipelineJobStatus)
+def get_pipeline_job(job_id: str, db: Session = Depends(get_db)):
+    job = repositories.get_pipeline_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_status(job)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=PipelineJobStatus)
+def cancel_pipeline_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    runner: JobRunner = Depends(get_job_runner),
+):
+    """Queued jobs are cancelled at once, running ones at their next stage (409 once finished)."""
+    if repositories.get_pipeline_job(db, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not runner.cancel(db, job_id):
+        raise HTTPException(status_code=409, detail="Job already finished")
+    db.expire_all()
+    return _job_status(repositories.get_pipeline_job(db, job_id))
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.db import repositories
+from app.domain.agents.pricing_agent import PricingAgent
+from app.domain.agents.technical_agent import TechnicalAgent
+from app.models.schemas import WhatIfRequest, WhatIfResponse
+
+router = APIRouter(prefix="/pricing", tags=["pricing"])
+
+
+@router.post("/what-if", response_model=WhatIfResponse)
+def what_if(request: WhatIfRequest, db: Session = Depends(get_db)):
+    """
+    Prices the top `top_k` alternatives of every line of one RFP and returns
+    the cheapest selection for each minimum spec-match threshold.
+    """
+    rfp = repositories.get_rfp_by_external_id(db, request.external_id, load=("line_items",))
+    if not rfp:
+        raise HTTPException(status_code=404, detail="RFP not found in database")
+
+    technical_table = TechnicalAgent().process_rfp(db, rfp, top_k=request.top_k)
+    scenarios = PricingAgent().what_if(db, technical_table, request.min_spec_match)
+    return WhatIfResponse(rfp_id=rfp.external_id, scenarios=scenarios)
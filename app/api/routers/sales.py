@@ -1,28 +1,57 @@
-from typing import List
-from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.domain.agents.sales_agent import SalesAgent
+from app.domain.agents.sales_agent import SalesAgent, decode_scan_cursor, encode_scan_cursor
 from app.db.session import get_db
 from app.models.schemas import RFPSummary
 
 router = APIRouter(prefix="/sales", tags=["sales"])
 
+DEFAULT_URLS = [
+    "http://test.com",
+]
+
 
 def get_sales_agent() -> SalesAgent:
     return SalesAgent()
 
 
 @router.get("/scan", response_model=List[RFPSummary])
-def scan_rfps(
+async def scan_rfps(
+    response: Response,
+    urls: List[str] = Query(
+        default=DEFAULT_URLS,
+        description="List of URLs for Sales Agent to scan",
+    ),
+    months: int = 3,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size (default: all RFPs)."),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page."),
+    db: Session = Depends(get_db),
+    agent: SalesAgent = Depends(get_sales_agent),
+):
+    try:
+        after = decode_scan_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    page = await agent.scan_rfps_async(db, urls, within_months=months, limit=limit, after=after)
+    if limit is not None and len(page) == limit:
+        response.headers["X-Next-Cursor"] = encode_scan_cursor(page[-1])
+    return page
+
+
+@router.get("/scan/stream")
+def stream_rfps(
     urls: List[str] = Query(
-        default=[
-            "http://test.com",
-        ],
+        default=DEFAULT_URLS,
         description="List of URLs for Sales Agent to scan",
     ),
     months: int = 3,
     db: Session = Depends(get_db),
     agent: SalesAgent = Depends(get_sales_agent),
 ):
-    return agent.scan_rfps(db, urls, within_months=months)
+    """NDJSON, one RFPSummary per line, in scan order."""
+    lines = (summary.model_dump_json() + "\n" for summary in agent.iter_rfp_summaries(db, urls, within_months=months))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
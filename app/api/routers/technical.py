@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.db import repositories
+from app.domain.agents.technical_agent import TechnicalAgent, match_cache
+from app.models.schemas import (
+    MatchCacheStats,
+    RFPTechnicalTable,
+    TechnicalBatchRequest,
+    TechnicalBatchResponse,
+)
+
+router = APIRouter(prefix="/technical", tags=["technical"])
+
+
+def get_technical_agent() -> TechnicalAgent:
+    return TechnicalAgent()
+
+
+@router.post("/match-batch", response_model=TechnicalBatchResponse)
+def match_batch(
+    request: TechnicalBatchRequest,
+    db: Session = Depends(get_db),
+    agent: TechnicalAgent = Depends(get_technical_agent),
+):
+    """
+    Builds the technical match table for many RFPs in a single pass.
+    Select RFPs by `external_ids`, or by `due_within_months` (optionally filtered by `urls`).
+    """
+    if request.external_ids is None and request.due_within_months is None:
+        raise HTTPException(status_code=400, detail="Provide external_ids or due_within_months.")
+
+    if request.external_ids is not None:
+        rfps = repositories.get_rfps_by_external_ids(db, request.external_ids)
+        found = {rfp.external_id for rfp in rfps}
+        not_found = [ext_id for ext_id in request.external_ids if ext_id not in found]
+    else:
+        rfps = repositories.get_rfps_due_within(db, request.urls, request.due_within_months)
+        not_found = []
+
+    rfps.sort(key=lambda r: (r.due_date, r.external_id))
+    tables = agent.match_rfps(db, rfps, top_k=request.top_k)
+
+    return TechnicalBatchResponse(
+        results=[
+            RFPTechnicalTable(
+                rfp_id=rfp.external_id,
+                title=rfp.title,
+                due_date=rfp.due_date,
+                technical_table=tables[rfp.id],
+            )
+            for rfp in rfps
+        ],
+        not_found=not_found,
+    )
+
+
+@router.get("/match-cache", response_model=MatchCacheStats)
+def match_cache_stats():
+    """Hit/miss counters of the memoized spec-match results."""
+    return match_cache.stats()
@@ -11,6 +11,36 @@ class Settings(BaseSettings):
     gemini_api_key: str = "GEMINI_API_KEY"
     gemini_model: str = "models/gemini-2.5-flash"
 
+    # Spec matcher used by the catalog snapshot: "indexed" | "vectorized" | "sharded" | "ann"
+    spec_matcher: str = "indexed"
+    # "sharded" only: worker processes, and the catalog size below which it scans in-process
+    spec_match_workers: int = 4
+    spec_match_shard_min_size: int = 50000
+    # "ann" only: neighbours fetched from the line item's own partition before exact re-scoring
+    spec_ann_candidates: int = 32
+    # LRU entries of memoized top-k results per requirement (0 disables)
+    spec_match_cache_size: int = 4096
+
+    # Price book refresh interval for price changes made outside the API (0 = never expire)
+    price_book_ttl_seconds: int = 300
+    # RFP test charges: "per_line" | "summary" | "pro_rata_quantity" | "pro_rata_material"
+    test_cost_allocation: str = "per_line"
+
+    # Threads running the technical/pricing stages of a multi-RFP pipeline run (one DB session each)
+    pipeline_max_workers: int = 4
+    # Async endpoints (app/core/executors.py): DB, pricing + downloads, matching/OCR, Selenium browsers
+    blocking_io_workers: int = 32
+    cpu_workers: int = 4
+    browser_workers: int = 2
+    # LLM calls in flight at once while a live-mode scan parses new listings
+    llm_max_concurrency: int = 16
+
+    # /pipeline/jobs: jobs run at once, and jobs queued or running before new ones are refused
+    pipeline_job_workers: int = 2
+    pipeline_job_max_pending: int = 100
+    # Resubmit queued jobs on startup; disable when several API processes share the DB
+    pipeline_job_recover_on_startup: bool = True
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -0,0 +1,58 @@
+"""
+Dedicated thread pools for the async endpoints, so slow work of one kind
+cannot starve the others (or Starlette's shared threadpool):
+
+- "blocking": DB queries (including pricing) and file / HTTP downloads
+- "cpu": spec matching and PDF text extraction / OCR, never DB access
+- "browser": Selenium scraping, one headless browser per thread
+
+    listings = await run_in("browser", scraper.scrape_listings, url)
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Literal, TypeVar
+
+from app.core.config import get_settings
+
+ExecutorName = Literal["blocking", "cpu", "browser"]
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+
+def _max_workers(name: ExecutorName) -> int:
+    settings = get_settings()
+    return {
+        "blocking": settings.blocking_io_workers,
+        "cpu": settings.cpu_workers,
+        "browser": settings.browser_workers,
+    }[name]
+
+
+def get_executor(name: ExecutorName) -> ThreadPoolExecutor:
+    with _lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = ThreadPoolExecutor(
+                max_workers=_max_workers(name), thread_name_prefix=f"{name}-executor"
+            )
+        return executor
+
+
+async def run_in(name: ExecutorName, fn: Callable[..., T], *args, **kwargs) -> T:
+    """Awaits `fn(*args, **kwargs)` run on the `name` executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(name), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    """Waits for running work and drops the pools (recreated on next use)."""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
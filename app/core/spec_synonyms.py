@@ -0,0 +1,21 @@
+"""
+Spelling variants of categorical spec values, shared by the matcher
+(app.domain.spec_matching) and the SQL alignment queries (app.db.repositories).
+"""
+from typing import Dict
+
+# Spelling variants seen in tenders and catalogs, mapped to one canonical form
+SPEC_SYNONYMS: Dict[str, Dict[str, str]] = {
+    "conductor": {
+        "aluminum": "aluminium",
+        "al": "aluminium",
+        "alu": "aluminium",
+        "cu": "copper",
+    },
+    "insulation": {
+        "cross-linked polyethylene": "xlpe",
+        "cross linked polyethylene": "xlpe",
+        "polyvinyl chloride": "pvc",
+        "ethylene propylene rubber": "epr",
+    },
+}
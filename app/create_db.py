@@ -1,5 +1,8 @@
 # create_db.py
 from app.db.session import engine
 from app.db import models
+from app.db.migrations import migrate
 
 models.Base.metadata.create_all(bind=engine)
+# Existing databases: add indexes / constraints introduced since they were created
+migrate(engine)
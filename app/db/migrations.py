@@ -0,0 +1,197 @@
+"""
+Versioned schema migrations for databases created before an index or
+constraint was added to the models (`create_all` never alters existing
+tables).
+
+Applied migrations are recorded in `schema_migrations`; `migrate()` runs the
+pending ones in order, each in its own transaction. Every migration is
+idempotent, so on a fresh database (already complete after `create_all`)
+they are only recorded.
+
+    python -m app.db.migrations           # create missing tables, apply pending migrations
+    python -m app.db.migrations --check   # EXPLAIN the hot queries, verify index use
+"""
+import sys
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, List, NamedTuple
+
+from sqlalchemy import (
+    Column, Date, DateTime, Float, Index, Integer, MetaData, String, Table, bindparam, inspect, select, text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.db import models
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def _create_model_index(table: str, name: str) -> Callable[[Connection], None]:
+    def apply(conn: Connection) -> None:
+        index = next(ix for ix in models.Base.metadata.tables[table].indexes if ix.name == name)
+        index.create(conn, checkfirst=True)
+
+    return apply
+
+
+def _unique_sku_prices(conn: Connection) -> None:
+    # Keep the oldest row per SKU, the one get_sku_price and the price book read
+    conn.execute(text(
+        "DELETE FROM sku_prices WHERE id NOT IN (SELECT MIN(id) FROM sku_prices GROUP BY sku)"
+    ))
+    existing = {ix["name"]: ix for ix in inspect(conn).get_indexes("sku_prices")}
+    current = existing.get("ix_sku_prices_sku")
+    if current is not None and not current["unique"]:
+        conn.execute(text("DROP INDEX ix_sku_prices_sku"))
+        current = None
+    if current is None:
+        conn.execute(text("CREATE UNIQUE INDEX ix_sku_prices_sku ON sku_prices (sku)"))
+
+
+def _seed_sku_price_history(conn: Connection) -> None:
+    # The table as this migration created it, frozen here rather than read from models
+    history = Table(
+        "sku_price_history",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("sku", String),
+        Column("unit_price", Float),
+        Column("effective_from", Date, nullable=False),
+        Index("ix_sku_price_history_sku_effective_from", "sku", "effective_from"),
+    )
+    history.create(conn, checkfirst=True)
+    # Prices held before history was kept count as effective since the epoch
+    conn.execute(
+        text(
+            "INSERT INTO sku_price_history (sku, unit_price, effective_from)"
+            " SELECT sku, unit_price, :epoch FROM sku_prices"
+            " WHERE NOT EXISTS (SELECT 1 FROM sku_price_history h WHERE h.sku = sku_prices.sku)"
+        ).bindparams(bindparam("epoch", date(1970, 1, 1), type_=Date))
+    )
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "index rfp_line_items.rfp_id", _create_model_index("rfp_line_items", "ix_rfp_line_items_rfp_id")),
+    Migration(2, "index rfp_tests.rfp_id", _create_model_index("rfp_tests", "ix_rfp_tests_rfp_id")),
+    Migration(3, "index rfps (source_url, due_date)", _create_model_index("rfps", "ix_rfps_source_url_due_date")),
+    Migration(4, "unique sku_prices.sku (drops duplicate rows)", _unique_sku_prices),
+    Migration(5, "seed sku_price_history with the prices held before history was kept", _seed_sku_price_history),
+]
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    _metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        return list(conn.scalars(select(schema_migrations.c.version).order_by(schema_migrations.c.version)))
+
+
+def migrate(engine: Engine) -> List[int]:
+    """Applies pending migrations in version order. Returns the versions applied."""
+    done = set(applied_versions(engine))
+    applied = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        with engine.begin() as conn:
+            migration.apply(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.now(timezone.utc),
+            ))
+        applied.append(migration.version)
+    return applied
+
+
+# Hot query shapes -> index the planner is expected to use for them
+HOT_QUERIES: Dict[str, tuple] = {
+    "line items of an RFP": (
+        "SELECT * FROM rfp_line_items WHERE rfp_id = :rfp_id",
+        {"rfp_id": 1},
+        "ix_rfp_line_items_rfp_id",
+    ),
+    "tests of an RFP": (
+        "SELECT * FROM rfp_tests WHERE rfp_id = :rfp_id",
+        {"rfp_id": 1},
+        "ix_rfp_tests_rfp_id",
+    ),
+    "RFPs due by source": (
+        "SELECT * FROM rfps WHERE source_url IN (:url_1, :url_2) AND due_date <= :cutoff",
+        {"url_1": "http://a", "url_2": "http://b", "cutoff": "2030-01-01"},
+        "ix_rfps_source_url_due_date",
+    ),
+    "price of a SKU": (
+        "SELECT * FROM sku_prices WHERE sku = :sku",
+        {"sku": "X"},
+        "ix_sku_prices_sku",
+    ),
+    "price history of a SKU": (
+        "SELECT * FROM sku_price_history WHERE sku = :sku AND effective_from <= :as_of",
+        {"sku": "X", "as_of": "2030-01-01"},
+        "ix_sku_price_history_sku_effective_from",
+    ),
+    "ranked RFPs (/sales/scan)": (
+        "SELECT * FROM rfp_scores JOIN rfps ON rfps.id = rfp_scores.rfp_id"
+        " WHERE rfps.due_date <= :cutoff ORDER BY rfp_scores.score DESC, rfps.external_id LIMIT 50",
+        {"cutoff": "2030-01-01"},
+        "ix_rfp_scores_score",
+    ),
+}
+
+
+def explain(conn: Connection, sql: str, params: dict) -> str:
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    return "\n".join(" ".join(str(col) for col in row) for row in conn.execute(text(prefix + sql), params))
+
+
+def check_indexes(engine: Engine) -> Dict[str, str]:
+    """
+    EXPLAINs every hot query and returns {query name: plan} for those whose
+    plan does not use the expected index, or {query name: error} for those
+    that cannot run yet (empty dict = all good).
+    """
+    problems = {}
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # Small or empty tables would otherwise be scanned sequentially
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, (sql, params, index) in HOT_QUERIES.items():
+            try:
+                with conn.begin_nested():
+                    plan = explain(conn, sql, params)
+            except DBAPIError as exc:  # e.g. a table added by a pending migration
+                plan = str(exc.orig)
+            if index not in plan:
+                problems[name] = plan
+        conn.rollback()
+    return problems
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+
+    if "--check" in sys.argv[1:]:
+        problems = check_indexes(engine)
+        for name, plan in problems.items():
+            print(f"❌ {name}: expected index not used\n{plan}")
+        if not problems:
+            print("✅ All hot queries use their indexes.")
+        sys.exit(1 if problems else 0)
+
+    # Migrations alter existing tables; on an empty database create them first
+    models.Base.metadata.create_all(bind=engine)
+    applied = migrate(engine)
+    print(f"Applied migrations: {applied}" if applied else "Database schema is up to date.")
@@ -1,6 +1,6 @@
-from datetime import date
+from datetime import date, datetime
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Float, Boolean, ForeignKey, Date
+from sqlalchemy import JSON, String, Integer, Float, Boolean, ForeignKey, Date, DateTime, Index
 from typing import List
 
 
@@ -10,6 +10,8 @@ class Base(DeclarativeBase):
 
 class RFP(Base):
     __tablename__ = "rfps"
+    # get_rfps_due_within / get_rfp_alignment: source_url IN (...) AND due_date <= ?
+    __table_args__ = (Index("ix_rfps_source_url_due_date", "source_url", "due_date"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     external_id: Mapped[str] = mapped_column(String, unique=True, index=True)
@@ -25,13 +27,38 @@ class RFP(Base):
     tests: Mapped[List["RFPTest"]] = relationship(
         back_populates="rfp", cascade="all, delete-orphan"
     )
+    ranking: Mapped["RFPScore | None"] = relationship(
+        back_populates="rfp", cascade="all, delete-orphan"
+    )
+
+
+class RFPScore(Base):
+    """
+    Persisted /sales/scan ranking of an RFP. Alignment is refreshed when the
+    RFP is ingested or the catalog gains products; the time component when
+    `scored_on` is not today.
+    """
+
+    __tablename__ = "rfp_scores"
+    __table_args__ = (Index("ix_rfp_scores_score", "score"),)
+
+    rfp_id: Mapped[int] = mapped_column(ForeignKey("rfps.id", ondelete="CASCADE"), primary_key=True)
+    total_lines: Mapped[int] = mapped_column(Integer)
+    matched_lines: Mapped[int] = mapped_column(Integer)
+    short_scope: Mapped[str] = mapped_column(String)
+    product_alignment_score: Mapped[float] = mapped_column(Float)
+    time_readiness_score: Mapped[float] = mapped_column(Float)
+    score: Mapped[float] = mapped_column(Float)
+    scored_on: Mapped[date] = mapped_column(Date)
+
+    rfp: Mapped["RFP"] = relationship(back_populates="ranking")
 
 
 class RFPLineItem(Base):
     __tablename__ = "rfp_line_items"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    rfp_id: Mapped[int] = mapped_column(ForeignKey("rfps.id"))
+    rfp_id: Mapped[int] = mapped_column(ForeignKey("rfps.id"), index=True)
     line_no: Mapped[int] = mapped_column(Integer)
 
     description: Mapped[str] = mapped_column(String)
@@ -51,7 +78,7 @@ class RFPTest(Base):
     __tablename__ = "rfp_tests"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    rfp_id: Mapped[int] = mapped_column(ForeignKey("rfps.id"))
+    rfp_id: Mapped[int] = mapped_column(ForeignKey("rfps.id"), index=True)
 
     test_code: Mapped[str] = mapped_column(String)
 
@@ -79,8 +106,24 @@ class SkuPrice(Base):
     __tablename__ = "sku_prices"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    sku: Mapped[str] = mapped_column(String, index=True)
+    sku: Mapped[str] = mapped_column(String, unique=True, index=True)
+    unit_price: Mapped[float] = mapped_column(Float)
+
+
+# effective_from of the price a SKU had before its first recorded change
+PRICE_HISTORY_EPOCH = date(1970, 1, 1)
+
+
+class SkuPriceHistory(Base):
+    """Every price a SKU has had; `sku_prices` keeps the current one."""
+
+    __tablename__ = "sku_price_history"
+    __table_args__ = (Index("ix_sku_price_history_sku_effective_from", "sku", "effective_from"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sku: Mapped[str] = mapped_column(String)
     unit_price: Mapped[float] = mapped_column(Float)
+    effective_from: Mapped[date] = mapped_column(Date, nullable=False)
 
 
 class TestPrice(Base):
@@ -89,3 +132,20 @@ class TestPrice(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     test_code: Mapped[str] = mapped_column(String, unique=True)
     price: Mapped[float] = mapped_column(Float)
+
+
+class PipelineJob(Base):
+    """A /pipeline/jobs run: parameters, progress and result (see app.services.job_runner)."""
+
+    __tablename__ = "pipeline_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    status: Mapped[str] = mapped_column(String, index=True)
+    params: Mapped[dict] = mapped_column(JSON)
+    stage: Mapped[str | None] = mapped_column(String, nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False)
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
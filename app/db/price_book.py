@@ -0,0 +1,118 @@
+"""
+Process-wide, versioned cache of the `sku_prices` and `test_prices` tables.
+
+Steady-state pricing reads the book without touching the DB. Writes made
+through `repositories.update_sku_price` / `create_product` are staged on the
+session and applied to the book when that session commits (dropped on
+rollback). Changes made outside the API are picked up when the book is older
+than `Settings.price_book_ttl_seconds`, or on `invalidate_price_book()`.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Mapping
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db import models
+
+# session.info key holding the SKU prices written in the current transaction
+_PENDING_KEY = "price_book_pending"
+
+
+@dataclass(frozen=True)
+class PriceBook:
+    version: int
+    loaded_at: float
+    sku_prices: Mapping[str, float]
+    test_prices: Mapping[str, float]
+
+
+_lock = threading.Lock()
+_version = 0
+_book: PriceBook | None = None
+
+
+def _load(db: Session, version: int) -> PriceBook:
+    # Descending id: if a SKU has several rows the oldest one wins, like get_sku_price
+    sku_rows = db.execute(
+        select(models.SkuPrice.sku, models.SkuPrice.unit_price).order_by(models.SkuPrice.id.desc())
+    )
+    test_rows = db.execute(select(models.TestPrice.test_code, models.TestPrice.price))
+    return PriceBook(
+        version=version,
+        loaded_at=time.monotonic(),
+        sku_prices={sku: price for sku, price in sku_rows},
+        test_prices={code: price for code, price in test_rows},
+    )
+
+
+def _is_fresh(book: PriceBook | None) -> bool:
+    if book is None or book.version != _version:
+        return False
+    ttl = get_settings().price_book_ttl_seconds
+    return ttl <= 0 or time.monotonic() - book.loaded_at < ttl
+
+
+def price_book_version() -> int:
+    return _version
+
+
+def invalidate_price_book() -> int:
+    """Marks the current book stale. Returns the new version."""
+    global _version
+    with _lock:
+        _version += 1
+        return _version
+
+
+def get_price_book(db: Session) -> PriceBook:
+    """Returns the current book, reloading both tables when stale or expired."""
+    global _book
+    book = _book
+    if _is_fresh(book):
+        return book
+
+    with _lock:
+        if _is_fresh(_book):
+            return _book
+        _book = _load(db, _version)
+        return _book
+
+
+def stage_sku_price(db: Session, sku: str, price: float) -> None:
+    """Records a SKU price write, applied to the book when `db` commits."""
+    db.info.setdefault(_PENDING_KEY, {})[sku] = price
+
+
+def stage_sku_prices(db: Session, prices: Mapping[str, float]) -> None:
+    db.info.setdefault(_PENDING_KEY, {}).update(prices)
+
+
+def _apply(prices: Dict[str, float]) -> None:
+    global _version, _book
+    with _lock:
+        current = _book
+        _version += 1
+        if current is not None and current.version == _version - 1:
+            # Copy-on-write: readers holding the old book keep a consistent view
+            _book = PriceBook(
+                version=_version,
+                loaded_at=current.loaded_at,
+                sku_prices={**current.sku_prices, **prices},
+                test_prices=current.test_prices,
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        _apply(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
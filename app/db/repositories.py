@@ -1,26 +1,258 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from datetime import date, timedelta
-from typing import List
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
+from sqlalchemy import Date, and_, case, func, insert, literal, or_, select, tuple_, update
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Literal, Mapping, Sequence
+
+from app.db import models, price_book
+from app.core.spec_synonyms import SPEC_SYNONYMS
+
+# Eager loading for the RFP queries below:
+# - load: RFP relationships to populate up front ("line_items", "tests")
+# - strategy: "selectin" = one extra IN query per relationship (default, safe for
+#   several collections); "joined" = LEFT OUTER JOIN in the same query
+LoadStrategy = Literal["selectin", "joined"]
+_LOADERS = {"selectin": selectinload, "joined": joinedload}
+
+
+def _rfp_query(load: Sequence[str], strategy: LoadStrategy):
+    loader = _LOADERS[strategy]
+    return select(models.RFP).options(*(loader(getattr(models.RFP, name)) for name in load))
+
+
+def _rfp_scalars(db: Session, stmt, strategy: LoadStrategy):
+    result = db.scalars(stmt)
+    # Joined collections repeat the parent row once per child
+    return result.unique() if strategy == "joined" else result
 
-from app.db import models
-from app.data.rfp_listings import TODAY  # or compute date.today()
 
 def get_rfps_due_within(
-    db: Session, urls: List[str], months: int
+    db: Session,
+    urls: List[str] | None,
+    months: int,
+    load: Sequence[str] = (),
+    strategy: LoadStrategy = "selectin",
 ) -> list[models.RFP]:
-    cutoff = TODAY + timedelta(days=months * 30)
+    """RFPs due within `months`; `urls=None` means every source."""
+    cutoff = date.today() + timedelta(days=months * 30)
+    stmt = _rfp_query(load, strategy).where(models.RFP.due_date <= cutoff)
+    if urls is not None:
+        stmt = stmt.where(models.RFP.source_url.in_(urls))
+    return list(_rfp_scalars(db, stmt, strategy))
+
+
+def _canonical_sql(key: str, column):
+    """SQL counterpart of spec_matching.canonical_value: trimmed, lowercased, synonyms resolved."""
+    text = func.lower(func.trim(column))
+    synonyms = SPEC_SYNONYMS.get(key)
+    return case(synonyms, value=text, else_=text) if synonyms else text
+
+
+def _line_scope(db: Session):
+    """Scalar subquery: the line descriptions of each RFP joined in line item order."""
+    line = aliased(models.RFPLineItem)
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+        scope = func.string_agg(line.description, aggregate_order_by(literal(", "), line.id))
+        return select(scope).where(line.rfp_id == models.RFP.id).scalar_subquery()
+    # No ordered aggregate: concatenate the rows of a subquery already sorted by line item id
+    ordered = (
+        select(line.description)
+        .where(line.rfp_id == models.RFP.id)
+        .order_by(line.id)
+        .correlate(models.RFP)
+        .subquery()
+    )
+    return select(func.aggregate_strings(ordered.c.description, ", ")).scalar_subquery()
+
+
+def _catalog_pairs():
+    product = models.Product
+    return (
+        select(
+            _canonical_sql("conductor", product.conductor).label("conductor"),
+            _canonical_sql("insulation", product.insulation).label("insulation"),
+        )
+        .where(product.conductor != "", product.insulation != "")
+        .distinct()
+        .subquery()
+    )
+
+
+def get_rfp_alignment(
+    db: Session,
+    urls: List[str] | None = None,
+    months: int | None = None,
+    rfp_ids: List[int] | None = None,
+    scope_chars: int = 200,
+) -> list:
+    """
+    One aggregate query over the RFPs due within `months` (None: any date),
+    from `urls` (None: every source), optionally restricted to `rfp_ids`.
+    Per RFP returns: id, external_id, title, source_url, due_date,
+    total_lines, matched_lines (lines whose canonical (conductor, insulation)
+    pair exists in the products table) and short_scope (line descriptions,
+    first `scope_chars` characters).
+    """
+    line = models.RFPLineItem
+    catalog_pairs = _catalog_pairs()
     stmt = (
-        select(models.RFP)
-        .where(models.RFP.source_url.in_(urls))
-        .where(models.RFP.due_date <= cutoff)
+        select(
+            models.RFP.id,
+            models.RFP.external_id,
+            models.RFP.title,
+            models.RFP.source_url,
+            models.RFP.due_date,
+            func.count(line.id).label("total_lines"),
+            func.count(catalog_pairs.c.conductor).label("matched_lines"),
+            func.substr(func.coalesce(_line_scope(db), ""), 1, scope_chars).label("short_scope"),
+        )
+        .outerjoin(line, line.rfp_id == models.RFP.id)
+        .outerjoin(
+            catalog_pairs,
+            and_(
+                catalog_pairs.c.conductor == _canonical_sql("conductor", line.conductor),
+                catalog_pairs.c.insulation == _canonical_sql("insulation", line.insulation),
+            ),
+        )
+        .group_by(models.RFP.id)
+        .order_by(models.RFP.id)
+    )
+    if months is not None:
+        stmt = stmt.where(models.RFP.due_date <= date.today() + timedelta(days=months * 30))
+    if urls is not None:
+        stmt = stmt.where(models.RFP.source_url.in_(urls))
+    if rfp_ids is not None:
+        stmt = stmt.where(models.RFP.id.in_(rfp_ids))
+    return list(db.execute(stmt))
+
+
+def get_rfp_ids_with_specs(db: Session, pairs: set[tuple[str, str]]) -> list[int]:
+    """RFPs with a line item whose canonical (conductor, insulation) is in `pairs`."""
+    if not pairs:
+        return []
+    line = models.RFPLineItem
+    key = tuple_(_canonical_sql("conductor", line.conductor), _canonical_sql("insulation", line.insulation))
+    return list(db.scalars(select(line.rfp_id).where(key.in_(list(pairs))).distinct()))
+
+
+def get_unscored_rfp_ids(db: Session) -> list[int]:
+    stmt = (
+        select(models.RFP.id)
+        .outerjoin(models.RFPScore, models.RFPScore.rfp_id == models.RFP.id)
+        .where(models.RFPScore.rfp_id.is_(None))
     )
     return list(db.scalars(stmt))
 
 
-def get_rfp_by_external_id(db: Session, external_id: str) -> models.RFP | None:
-    stmt = select(models.RFP).where(models.RFP.external_id == external_id)
-    return db.scalars(stmt).first()
+def get_scores_not_scored_on(db: Session, day: date) -> list:
+    """(rfp_id, due_date, product_alignment_score) of scores whose time component is not from `day`."""
+    stmt = (
+        select(models.RFPScore.rfp_id, models.RFP.due_date, models.RFPScore.product_alignment_score)
+        .join(models.RFP, models.RFP.id == models.RFPScore.rfp_id)
+        .where(models.RFPScore.scored_on != day)
+    )
+    return list(db.execute(stmt))
+
+
+def upsert_rfp_scores(db: Session, scores: List[dict]) -> None:
+    """
+    Inserts or replaces score rows (RFPScore column dicts) with
+    INSERT ... ON CONFLICT (rfp_id) DO UPDATE, so concurrent refreshes of the
+    same RFP (two first scans, a scan during ingest) cannot collide on the
+    primary key. Does not commit.
+    """
+    if not scores:
+        return
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        for row in scores:
+            db.merge(models.RFPScore(**row))
+        return
+    stmt = dialect_insert(models.RFPScore)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.RFPScore.rfp_id],
+        set_={key: stmt.excluded[key] for key in scores[0] if key != "rfp_id"},
+    )
+    db.execute(stmt, scores)
+
+
+def update_rfp_scores(db: Session, scores: List[dict]) -> None:
+    """Bulk UPDATE by primary key; each dict holds `rfp_id` and the columns to set. Does not commit."""
+    if scores:
+        db.execute(update(models.RFPScore), scores)
+
+
+def iter_ranked_rfps(
+    db: Session,
+    urls: List[str] | None,
+    months: int,
+    limit: int | None = None,
+    after: tuple[float, str] | None = None,
+    yield_per: int | None = None,
+):
+    """
+    Scored RFPs due within `months`, best first: ORDER BY score DESC,
+    external_id, served by the rfp_scores score index. `after` is the
+    (score, external_id) of the last row of the previous page. Rows carry
+    the RFP header fields plus the RFPScore columns.
+    """
+    score = models.RFPScore
+    stmt = (
+        select(
+            models.RFP.external_id,
+            models.RFP.title,
+            models.RFP.source_url,
+            models.RFP.due_date,
+            score.short_scope,
+            score.score,
+            score.product_alignment_score,
+            score.time_readiness_score,
+        )
+        .join(score, score.rfp_id == models.RFP.id)
+        .where(models.RFP.due_date <= date.today() + timedelta(days=months * 30))
+        .order_by(score.score.desc(), models.RFP.external_id)
+    )
+    if urls is not None:
+        stmt = stmt.where(models.RFP.source_url.in_(urls))
+    if after is not None:
+        last_score, last_id = after
+        stmt = stmt.where(
+            or_(score.score < last_score, and_(score.score == last_score, models.RFP.external_id > last_id))
+        )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    if yield_per:
+        stmt = stmt.execution_options(yield_per=yield_per)
+    return db.execute(stmt)
+
+
+def get_rfp_by_external_id(
+    db: Session, external_id: str, load: Sequence[str] = (), strategy: LoadStrategy = "selectin"
+) -> models.RFP | None:
+    stmt = _rfp_query(load, strategy).where(models.RFP.external_id == external_id)
+    return _rfp_scalars(db, stmt, strategy).first()
+
+
+def get_rfps_by_external_ids(
+    db: Session, external_ids: List[str], load: Sequence[str] = (), strategy: LoadStrategy = "selectin"
+) -> list[models.RFP]:
+    if not external_ids:
+        return []
+    stmt = _rfp_query(load, strategy).where(models.RFP.external_id.in_(external_ids))
+    return list(_rfp_scalars(db, stmt, strategy))
+
+
+def get_line_items_for_rfps(db: Session, rfp_ids: List[int]) -> list[models.RFPLineItem]:
+    """Line items of many RFPs in one query, grouped by RFP."""
+    if not rfp_ids:
+        return []
+    stmt = (
+        select(models.RFPLineItem)
+        .where(models.RFPLineItem.rfp_id.in_(rfp_ids))
+        .order_by(models.RFPLineItem.rfp_id, models.RFPLineItem.id)
+    )
+    return list(db.scalars(stmt))
 
 
 def get_all_products(db: Session) -> list[models.Product]:
@@ -34,6 +266,60 @@ def get_sku_price(db: Session, sku: str) -> float:
     return row.unit_price if row else 0.0
 
 
+def get_sku_prices_as_of(db: Session, skus: List[str], as_of: date) -> dict[str, float]:
+    """
+    Unit prices of many SKUs as they were on `as_of`, in one query: the latest
+    history entry effective on or before that date. Before a SKU's first
+    entry, its earliest known price applies; SKUs without any history were
+    never changed and use their current price.
+    """
+    if not skus:
+        return {}
+    history = models.SkuPriceHistory
+
+    def first_per_sku(order_by, *where):
+        ranked = (
+            select(
+                history.sku,
+                history.unit_price,
+                func.row_number().over(partition_by=history.sku, order_by=order_by).label("rank"),
+            )
+            .where(history.sku.in_(set(skus)), *where)
+            .subquery()
+        )
+        return select(ranked.c.sku, ranked.c.unit_price).where(ranked.c.rank == 1).subquery()
+
+    latest = first_per_sku((history.effective_from.desc(), history.id.desc()), history.effective_from <= as_of)
+    earliest = first_per_sku((history.effective_from.asc(), history.id.asc()))
+    stmt = (
+        select(
+            models.SkuPrice.sku,
+            func.coalesce(latest.c.unit_price, earliest.c.unit_price, models.SkuPrice.unit_price),
+        )
+        .outerjoin(latest, latest.c.sku == models.SkuPrice.sku)
+        .outerjoin(earliest, earliest.c.sku == models.SkuPrice.sku)
+        .where(models.SkuPrice.sku.in_(set(skus)))
+    )
+    return {sku: unit_price for sku, unit_price in db.execute(stmt)}
+
+
+def backfill_sku_price_history(db: Session, skus: List[str] | None = None) -> None:
+    """
+    Records the current price of SKUs (`None`: all) that have no history yet
+    as effective since PRICE_HISTORY_EPOCH, so a first change does not
+    rewrite the price of earlier dates. Run before writing a new price.
+    """
+    history = models.SkuPriceHistory
+    source = select(
+        models.SkuPrice.sku, models.SkuPrice.unit_price, literal(models.PRICE_HISTORY_EPOCH, type_=Date)
+    ).where(~select(history.id).where(history.sku == models.SkuPrice.sku).exists())
+    if skus is not None:
+        if not skus:
+            return
+        source = source.where(models.SkuPrice.sku.in_(set(skus)))
+    db.execute(insert(history).from_select(["sku", "unit_price", "effective_from"], source))
+
+
 def get_test_prices(db: Session, codes: list[str]) -> dict[str, float]:
     if not codes:
         return {}
@@ -67,10 +353,34 @@ def create_product(db: Session, product_data: dict) -> models.Product:
     return product
 
 
+def get_existing_skus(db: Session, skus: List[str]) -> set[str]:
+    if not skus:
+        return set()
+    stmt = select(models.Product.sku).where(models.Product.sku.in_(skus))
+    return set(db.scalars(stmt))
+
+
+def bulk_create_products(db: Session, products: List[dict]) -> int:
+    """
+    Inserts many products with one executemany, and upserts the initial
+    prices (`unit_price` > 0) of those that carry one. Does not commit.
+    """
+    if not products:
+        return 0
+    columns = [c.key for c in models.Product.__table__.columns if c.key != "id"]
+    db.execute(insert(models.Product), [{key: p[key] for key in columns} for p in products])
+    upsert_sku_prices(db, {p["sku"]: p["unit_price"] for p in products if p.get("unit_price", 0) > 0})
+    return len(products)
+
+
 def update_sku_price(db: Session, sku: str, price: float) -> models.SkuPrice:
     stmt = select(models.SkuPrice).where(models.SkuPrice.sku == sku)
     existing = db.scalars(stmt).first()
-    
+    # Write-through: the price book picks this up when the session commits
+    price_book.stage_sku_price(db, sku, price)
+    backfill_sku_price_history(db, [sku])
+    db.add(models.SkuPriceHistory(sku=sku, unit_price=price, effective_from=date.today()))
+
     if existing:
         existing.unit_price = price
         db.add(existing)
@@ -79,3 +389,80 @@ def update_sku_price(db: Session, sku: str, price: float) -> models.SkuPrice:
         new_price = models.SkuPrice(sku=sku, unit_price=price)
         db.add(new_price)
         return new_price
+
+
+def _dialect_insert(db: Session):
+    """The dialect's insert() with ON CONFLICT support (Postgres/SQLite), else None."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def upsert_sku_prices(db: Session, prices: Mapping[str, float]) -> int:
+    """
+    Inserts or updates many SKU prices with one multi-row
+    INSERT ... ON CONFLICT (sku) DO UPDATE on Postgres/SQLite (falls back to
+    update_sku_price on other dialects). Does not commit. Returns the row count.
+    """
+    if not prices:
+        return 0
+
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        for sku, price in prices.items():
+            update_sku_price(db, sku, price)
+        return len(prices)
+
+    backfill_sku_price_history(db, list(prices))
+    stmt = dialect_insert(models.SkuPrice)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.SkuPrice.sku], set_={"unit_price": stmt.excluded.unit_price}
+    )
+    rows = [{"sku": sku, "unit_price": price} for sku, price in prices.items()]
+    db.execute(stmt, rows)
+    today = date.today()
+    db.execute(insert(models.SkuPriceHistory), [{**row, "effective_from": today} for row in rows])
+    price_book.stage_sku_prices(db, prices)
+    return len(prices)
+
+
+def create_pipeline_job(db: Session, job_id: str, params: dict) -> models.PipelineJob:
+    """Adds a queued job. Does not commit."""
+    job = models.PipelineJob(
+        id=job_id, status="queued", params=params, cancel_requested=False, created_at=datetime.now(timezone.utc)
+    )
+    db.add(job)
+    return job
+
+
+def get_pipeline_job(db: Session, job_id: str) -> models.PipelineJob | None:
+    return db.get(models.PipelineJob, job_id)
+
+
+def get_pipeline_job_ids(db: Session, statuses: Sequence[str]) -> list[str]:
+    stmt = (
+        select(models.PipelineJob.id)
+        .where(models.PipelineJob.status.in_(statuses))
+        .order_by(models.PipelineJob.created_at)
+    )
+    return list(db.scalars(stmt))
+
+
+def transition_pipeline_job(db: Session, job_id: str, from_statuses: Sequence[str], **values) -> bool:
+    """
+    Sets `values` on the job only if its status is one of `from_statuses`,
+    in one conditional UPDATE, so concurrent transitions (a worker starting
+    the job, a client cancelling it) cannot both win. Does not commit.
+    """
+    stmt = (
+        update(models.PipelineJob)
+        .where(models.PipelineJob.id == job_id, models.PipelineJob.status.in_(from_statuses))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).rowcount == 1
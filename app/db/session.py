@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, scoped_session
 from app.core.config import get_settings
 
@@ -6,13 +6,21 @@ settings = get_settings()
 
 engine = create_engine(settings.database_url, pool_pre_ping=True)
 
-SessionLocal = scoped_session(
-    sessionmaker(autocommit=False, autoflush=False, bind=engine)
-)
+if engine.dialect.name == "sqlite":
+    # SQLite ignores ON DELETE CASCADE (rfp_scores) unless enabled per connection
+    @event.listens_for(engine, "connect")
+    def _enable_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+SessionFactory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = scoped_session(SessionFactory)
 
 
 def get_db():
-    db = SessionLocal()
+    # Not the thread-local SessionLocal: async endpoints keep using the session
+    # after FastAPI returns this dependency's thread to the pool, where the
+    # next request would be handed the same Session.
+    db = SessionFactory()
     try:
         yield db
     finally:
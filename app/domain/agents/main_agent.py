@@ -1,13 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from typing import List
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 
+from app.core.config import get_settings
+from app.core.executors import run_in
 from app.db import repositories, models as db_models
-from app.domain.agents.sales_agent import SalesAgent
-from app.domain.agents.technical_agent import TechnicalAgent
+from app.db.price_book import PriceBook, get_price_book
+from app.domain.catalog import CatalogSnapshot, get_catalog_snapshot
+from app.domain.agents.sales_agent import ProgressCallback, SalesAgent
+from app.domain.agents.technical_agent import DEFAULT_TOP_K, TechnicalAgent
 from app.domain.agents.pricing_agent import PricingAgent
 from app.domain.llm import generate_text
-from app.models.schemas import FullRFPResponse, RFPSummary, LineItemMatch, PricingSummary
+from app.models.schemas import FullRFPResponse, RFPSummary, LineItemMatch, PricingSummary, TestCostAllocation
 
 
 class MainAgent:
@@ -24,26 +30,154 @@ class MainAgent:
         self.tech = TechnicalAgent()
         self.pricing = PricingAgent()
 
-    def run_full_pipeline(self, db: Session, urls: List[str], live_mode: bool = False) -> FullRFPResponse:
+    def run_full_pipeline(
+        self,
+        db: Session,
+        urls: List[str],
+        live_mode: bool = False,
+        top_k: int = DEFAULT_TOP_K,
+        test_allocation: TestCostAllocation | None = None,
+        as_of: date | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> FullRFPResponse:
+        """`progress` is called with the stage at every checkpoint (see ProgressCallback)."""
         # 1) Sales Agent - get candidates and choose the best one
-        candidates: List[RFPSummary] = self.sales.scan_rfps(db, urls, live_mode=live_mode)
+        if progress:
+            progress("scanning")
+        candidates: List[RFPSummary] = self.sales.scan_rfps(db, urls, live_mode=live_mode, progress=progress)
         chosen_list = self.sales.choose_rfp_for_response(candidates, limit=1)
         
         if not chosen_list:
             raise HTTPException(status_code=404, detail="No RFPs found")
 
         # Process only the top-ranked RFP
+        response = self._respond(db, chosen_list[0], top_k, test_allocation, as_of, progress=progress)
+        if response is None:
+            raise HTTPException(status_code=404, detail="RFP not found in database")
+        return response
+
+    async def run_full_pipeline_async(
+        self,
+        db: Session,
+        urls: List[str],
+        live_mode: bool = False,
+        top_k: int = DEFAULT_TOP_K,
+        test_allocation: TestCostAllocation | None = None,
+        as_of: date | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> FullRFPResponse:
+        """
+        run_full_pipeline for async endpoints: LLM calls are awaited, scraping
+        and the technical/pricing stages run on the dedicated executors
+        (app.core.executors), so the event loop is never blocked.
+        """
+        if progress:
+            progress("scanning")
+        candidates: List[RFPSummary] = await self.sales.scan_rfps_async(db, urls, live_mode=live_mode)
+        chosen_list = self.sales.choose_rfp_for_response(candidates, limit=1)
+
+        if not chosen_list:
+            raise HTTPException(status_code=404, detail="No RFPs found")
+
+        # DB loads on "blocking"; only the matching itself runs on "cpu" (pinned catalog, no queries)
         chosen = chosen_list[0]
-        rfp: db_models.RFP | None = repositories.get_rfp_by_external_id(db, chosen.id)
-        
+        rfp = await run_in("blocking", self._load_rfp, db, chosen)
         if not rfp:
             raise HTTPException(status_code=404, detail="RFP not found in database")
+        catalog = await run_in("blocking", get_catalog_snapshot, db)
+        technical_table = await run_in("cpu", self._match, db, rfp, top_k, catalog, progress)
+        # Pricing reads the price book (and the price history with `as_of`)
+        return await run_in(
+            "blocking", self._price, db, chosen, rfp, technical_table, test_allocation, as_of, None, progress
+        )
 
+    def run_top_n_pipeline(
+        self,
+        db: Session,
+        urls: List[str],
+        top_n: int,
+        live_mode: bool = False,
+        top_k: int = DEFAULT_TOP_K,
+        test_allocation: TestCostAllocation | None = None,
+        as_of: date | None = None,
+    ) -> List[FullRFPResponse]:
+        """
+        Like run_full_pipeline for the `top_n` best RFPs, in rank order. The
+        technical and pricing stages run concurrently on up to
+        Settings.pipeline_max_workers threads, each with its own DB session;
+        all of them use the catalog snapshot and price book taken here, so
+        every response is priced against the same data.
+        """
+        candidates: List[RFPSummary] = self.sales.scan_rfps(db, urls, live_mode=live_mode, limit=top_n)
+        chosen_list = self.sales.choose_rfp_for_response(candidates, limit=top_n)
+        if not chosen_list:
+            raise HTTPException(status_code=404, detail="No RFPs found")
+
+        catalog = get_catalog_snapshot(db)
+        book = get_price_book(db)
+        worker_session = sessionmaker(bind=db.get_bind(), autocommit=False, autoflush=False)
+
+        def respond(chosen: RFPSummary) -> FullRFPResponse | None:
+            with worker_session() as worker_db:
+                return self._respond(worker_db, chosen, top_k, test_allocation, as_of, catalog, book)
+
+        workers = max(1, min(get_settings().pipeline_max_workers, len(chosen_list)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pipeline") as executor:
+            responses = list(executor.map(respond, chosen_list))
+
+        # RFPs deleted since the scan are skipped
+        return [response for response in responses if response is not None]
+
+    def _respond(
+        self,
+        db: Session,
+        chosen: RFPSummary,
+        top_k: int,
+        test_allocation: TestCostAllocation | None,
+        as_of: date | None,
+        catalog: CatalogSnapshot | None = None,
+        book: PriceBook | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> FullRFPResponse | None:
+        rfp = self._load_rfp(db, chosen)
+        if not rfp:
+            return None
+        technical_table = self._match(db, rfp, top_k, catalog, progress)
+        return self._price(db, chosen, rfp, technical_table, test_allocation, as_of, book, progress)
+
+    def _load_rfp(self, db: Session, chosen: RFPSummary) -> db_models.RFP | None:
+        return repositories.get_rfp_by_external_id(db, chosen.id, load=("line_items", "tests"))
+
+    def _match(
+        self,
+        db: Session,
+        rfp: db_models.RFP,
+        top_k: int,
+        catalog: CatalogSnapshot | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> List[LineItemMatch]:
         # 2) Technical Agent - process all line items for this RFP
-        technical_table: List[LineItemMatch] = self.tech.process_rfp(db, rfp)
+        if progress:
+            progress("matching")
+        return self.tech.process_rfp(db, rfp, top_k=top_k, catalog=catalog)
 
+    def _price(
+        self,
+        db: Session,
+        chosen: RFPSummary,
+        rfp: db_models.RFP,
+        technical_table: List[LineItemMatch],
+        test_allocation: TestCostAllocation | None,
+        as_of: date | None,
+        book: PriceBook | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> FullRFPResponse:
         # 3) Pricing Agent - calculate pricing for all line items
-        pricing_table: PricingSummary = self.pricing.price_rfp(db, technical_table, rfp.tests)
+        if progress:
+            progress("pricing")
+        pricing_table: PricingSummary = self.pricing.price_rfp(
+            db, technical_table, rfp.tests, allocation=test_allocation, as_of=as_of, book=book
+        )
 
         # Return single RFP response with all its line items
         return FullRFPResponse(
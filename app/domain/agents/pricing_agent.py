@@ -1,9 +1,79 @@
-from typing import List
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Mapping, Sequence, get_args
+import numpy as np
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.db import repositories
 from app.db import models as db_models
-from app.models.schemas import LineItemMatch, PricingRow, PricingSummary
+from app.db.price_book import PriceBook, get_price_book
+from app.models.schemas import (
+    LineItemMatch,
+    PricingRow,
+    PricingScenario,
+    PricingSummary,
+    RFPCharge,
+    ScenarioLine,
+    TestCostAllocation,
+)
+
+ALLOCATION_MODES = get_args(TestCostAllocation)
+
+
+@dataclass(frozen=True)
+class PricingContext:
+    """
+    RFP-level pricing inputs, read from the price book (no queries when it is
+    warm). With `as_of`, the SKU prices come from the price history instead.
+    """
+
+    unit_prices: Mapping[str, float]
+    test_codes: List[str]
+    test_prices: Mapping[str, float]
+    tests_cost: float
+
+    @classmethod
+    def load(
+        cls,
+        db: Session,
+        tests: list[db_models.RFPTest],
+        skus: List[str] | None = None,
+        as_of: date | None = None,
+        book: PriceBook | None = None,
+    ) -> "PricingContext":
+        book = book or get_price_book(db)
+        unit_prices = book.sku_prices
+        if as_of is not None:
+            unit_prices = repositories.get_sku_prices_as_of(db, skus or [], as_of)
+        test_codes = [t.test_code for t in tests]
+        return cls(
+            unit_prices=unit_prices,
+            test_codes=test_codes,
+            test_prices=book.test_prices,
+            tests_cost=sum(book.test_prices.get(code, 0.0) for code in test_codes),
+        )
+
+
+def allocate_pro_rata(total: float, weights: np.ndarray) -> np.ndarray:
+    """
+    Splits `total` over rows proportionally to `weights`, in whole paise, so
+    the shares add up to exactly round(total, 2) (largest remainder method).
+    Equal split when all weights are zero.
+    """
+    weights = np.clip(np.asarray(weights, dtype=np.float64), 0.0, None)
+    if weights.size == 0:
+        return weights
+    if weights.sum() <= 0:
+        weights = np.ones_like(weights)
+
+    cents = round(total * 100)
+    raw = cents * weights / weights.sum()
+    shares = np.floor(raw)
+    leftover = int(cents - shares.sum())
+    # Stable: on equal remainders the earlier row gets the extra paisa
+    shares[np.argsort(shares - raw, kind="stable")[:leftover]] += 1
+    return shares / 100
 
 
 class PricingAgent:
@@ -14,16 +84,17 @@ class PricingAgent:
         db: Session,
         line_match: LineItemMatch,
         tests: list[db_models.RFPTest],
+        context: PricingContext | None = None,
     ) -> PricingRow:
+        if context is None:
+            context = PricingContext.load(db, tests)
+
         sku = line_match.selected_sku.sku
         qty = line_match.quantity_m
 
-        unit_price = repositories.get_sku_price(db, sku)
+        unit_price = context.unit_prices.get(sku, 0.0)
         material_cost = unit_price * qty
-
-        test_codes = [t.test_code for t in tests]
-        test_price_map = repositories.get_test_prices(db, test_codes)
-        tests_cost = sum(test_price_map.get(code, 0.0) for code in test_codes)
+        tests_cost = context.tests_cost
 
         total_cost = material_cost + tests_cost
 
@@ -42,22 +113,142 @@ class PricingAgent:
         db: Session,
         technical_table: List[LineItemMatch],
         tests: list[db_models.RFPTest],
+        allocation: TestCostAllocation | None = None,
+        as_of: date | None = None,
+        book: PriceBook | None = None,
     ) -> PricingSummary:
-        rows: List[PricingRow] = []
-        total_material = 0.0
-        total_tests = 0.0
+        """
+        Prices every line. RFP-level test charges are handled according to
+        `allocation` (default: Settings.test_cost_allocation), see
+        TestCostAllocation. With `as_of`, SKUs are priced as they were on
+        that date (test prices are not historized). `book` pins a price
+        book snapshot (default: the current one).
+        """
+        allocation = allocation or get_settings().test_cost_allocation
+        if allocation not in ALLOCATION_MODES:
+            raise ValueError(f"Unknown test cost allocation: {allocation!r}")
 
-        for line in technical_table:
-            row = self.price_line_item(db, line, tests)
-            rows.append(row)
-            total_material += row.material_cost
-            total_tests += row.tests_cost
+        # A constant number of queries regardless of the line count
+        skus = [line.selected_sku.sku for line in technical_table]
+        context = PricingContext.load(db, tests, skus=skus, as_of=as_of, book=book)
 
-        grand = total_material + total_tests
+        if allocation == "per_line":
+            rows = [self.price_line_item(db, line, tests, context) for line in technical_table]
+            total_material = sum(row.material_cost for row in rows)
+            total_tests = sum(row.tests_cost for row in rows)
+            return PricingSummary(
+                rows=rows,
+                total_material_cost=round(total_material, 2),
+                total_tests_cost=round(total_tests, 2),
+                grand_total=round(total_material + total_tests, 2),
+                prices_as_of=as_of,
+            )
+
+        quantities = np.array([line.quantity_m for line in technical_table], dtype=np.float64)
+        unit_prices = np.array(
+            [context.unit_prices.get(line.selected_sku.sku, 0.0) for line in technical_table], dtype=np.float64
+        )
+        material = unit_prices * quantities
+        material_rounded = np.array([round(m, 2) for m in material.tolist()])
 
+        rfp_charges: List[RFPCharge] = []
+        if allocation == "summary":
+            row_tests = np.zeros_like(material)
+            rfp_charges = [
+                RFPCharge(code=code, amount=round(context.test_prices.get(code, 0.0), 2))
+                for code in context.test_codes
+            ]
+        else:
+            weights = quantities if allocation == "pro_rata_quantity" else material
+            row_tests = allocate_pro_rata(context.tests_cost, weights)
+
+        rows = [
+            PricingRow(
+                line_id=line.line_id,
+                selected_sku=line.selected_sku.sku,
+                quantity_m=line.quantity_m,
+                unit_price=float(unit_price),
+                material_cost=float(material_cost),
+                tests_cost=float(tests_cost),
+                total_cost=round(float(material_cost + tests_cost), 2),
+            )
+            for line, unit_price, material_cost, tests_cost in zip(
+                technical_table, unit_prices, material_rounded, row_tests
+            )
+        ]
+
+        total_material = float(material_rounded.sum())
+        total_tests = round(context.tests_cost, 2)
         return PricingSummary(
             rows=rows,
             total_material_cost=round(total_material, 2),
-            total_tests_cost=round(total_tests, 2),
-            grand_total=round(grand, 2),
+            total_tests_cost=total_tests,
+            grand_total=round(total_material + total_tests, 2),
+            test_cost_allocation=allocation,
+            rfp_charges=rfp_charges,
+            prices_as_of=as_of,
         )
+
+    def what_if(
+        self,
+        db: Session,
+        technical_table: List[LineItemMatch],
+        min_spec_match: Sequence[float],
+    ) -> List[PricingScenario]:
+        """
+        Cost/match-quality trade-off over the `top_3_matches` alternatives of
+        every line. Builds a line x alternative cost matrix once (prices from
+        the price book, unpriced SKUs excluded) and picks, for every threshold
+        at once, the cheapest alternative per line whose spec match is at
+        least that threshold. Ties go to the better-ranked alternative.
+        Returns one scenario per threshold, in the given order.
+        """
+        context = PricingContext.load(db, [])
+        n_lines = len(technical_table)
+        # At least one (empty) column so argmin below is defined for lines without alternatives
+        n_alts = max([len(line.top_3_matches) for line in technical_table] + [1])
+
+        cost = np.full((n_lines, n_alts), np.inf)
+        match = np.full((n_lines, n_alts), -np.inf)
+        unit = np.zeros((n_lines, n_alts))
+        for i, line in enumerate(technical_table):
+            for j, alt in enumerate(line.top_3_matches):
+                price = context.unit_prices.get(alt.sku)
+                if price is not None:
+                    unit[i, j] = price
+                    cost[i, j] = price * line.quantity_m
+                    match[i, j] = alt.spec_match_percent
+
+        thresholds = np.asarray(min_spec_match, dtype=np.float64)
+        # (thresholds, lines, alternatives): cost where the alternative qualifies
+        eligible = np.where(match[None, :, :] >= thresholds[:, None, None], cost[None, :, :], np.inf)
+        choice = eligible.argmin(axis=2)
+        feasible = np.isfinite(np.take_along_axis(eligible, choice[:, :, None], axis=2)[:, :, 0])
+
+        scenarios: List[PricingScenario] = []
+        for t, threshold in enumerate(thresholds.tolist()):
+            rows = [
+                ScenarioLine(
+                    line_id=line.line_id,
+                    selected_sku=line.top_3_matches[j].sku,
+                    spec_match_percent=line.top_3_matches[j].spec_match_percent,
+                    quantity_m=line.quantity_m,
+                    unit_price=float(unit[i, j]),
+                    material_cost=round(float(cost[i, j]), 2),
+                )
+                for i, (line, j) in enumerate(zip(technical_table, choice[t].tolist()))
+                if feasible[t, i]
+            ]
+            scenarios.append(
+                PricingScenario(
+                    min_spec_match=threshold,
+                    feasible=bool(feasible[t].all()),
+                    rows=rows,
+                    infeasible_lines=[line.line_id for line, ok in zip(technical_table, feasible[t]) if not ok],
+                    total_material_cost=round(sum(row.material_cost for row in rows), 2),
+                    average_spec_match=round(
+                        sum(row.spec_match_percent for row in rows) / len(rows), 2
+                    ) if rows else 0.0,
+                )
+            )
+        return scenarios
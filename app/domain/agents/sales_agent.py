@@ -1,17 +1,47 @@
-from typing import List
+from typing import Callable, Iterator, List, Tuple
 from datetime import date
 from sqlalchemy.orm import Session
+import asyncio
+import base64
+import binascii
 import json
 import logging
+import os
 
+from app.core.config import get_settings
+from app.core.executors import run_in
 from app.db import repositories, models as db_models
+from app.domain import rfp_scoring
 from app.models.schemas import RFPSummary
-from app.domain.llm import generate_text
+from app.domain.llm import generate_text, generate_text_async
 from app.services.scraper_service import GenericPSUScraper
 from app.services.pdf_parser import PDFParser
 
 logger = logging.getLogger(__name__)
 
+# Position in the scan order: (-score, id)
+ScanCursor = Tuple[float, str]
+
+# Called with the current stage at checkpoints of long runs; may raise to abort the run
+ProgressCallback = Callable[[str], None]
+
+
+def encode_scan_cursor(summary: RFPSummary) -> str:
+    """Opaque cursor for the page that starts after `summary`."""
+    raw = json.dumps([summary.score, summary.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_scan_cursor(cursor: str) -> ScanCursor:
+    """Raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, rfp_id = json.loads(raw)
+        return (-float(score), str(rfp_id))
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
 class SalesAgent:
     """Identifies RFPs and prepares summaries."""
 
@@ -19,79 +49,84 @@ class SalesAgent:
         self.scraper = GenericPSUScraper()
     
     def scan_rfps(
-        self, db: Session, urls: List[str], within_months: int = 3, live_mode: bool = False
+        self,
+        db: Session,
+        urls: List[str],
+        within_months: int = 3,
+        live_mode: bool = False,
+        limit: int | None = None,
+        after: ScanCursor | None = None,
+        progress: ProgressCallback | None = None,
     ) -> List[RFPSummary]:
-        
+        """
+        RFP summaries ordered by score desc, then id. `limit` / `after`
+        select one page: the first `limit` summaries ranked after the
+        `after` position (see encode_scan_cursor). `progress` is called
+        before every live-mode listing.
+        """
         if live_mode:
             logger.info("Running in LIVE MODE: Scraping portals...")
-            self._scrape_and_ingest(db, urls)
-        
-        # Whether live or not, we read the refined data from DB
-        rfps = repositories.get_rfps_due_within(db, urls, within_months)
-        
-        # Pre-fetch product specs for alignment check
-        all_products = repositories.get_all_products(db)
-        # Create a set of (conductor, insulation) tuples for fast lookup
-        inventory_specs = {
-            (p.conductor.lower(), p.insulation.lower()) 
-            for p in all_products 
-            if p.conductor and p.insulation
-        }
+            self._scrape_and_ingest(db, urls, progress)
 
-        results: List[RFPSummary] = []
+        # Sort by Final Score Descending, then by ID ascending (for consistent
+        # tiebreaking): an indexed ORDER BY over the persisted scores, so a
+        # page only reads `limit` rows.
+        rfp_scoring.ensure_scores(db)
+        last = (-after[0], after[1]) if after is not None else None
+        rows = repositories.iter_ranked_rfps(db, urls, within_months, limit=limit, after=last)
+        return [self._summarize(row) for row in rows]
 
-        for rfp in rfps:
-            days_to_due = (rfp.due_date - date.today()).days
-            
-            # --- Scoring Logic ---
-            # 1. Product Alignment (Weight 0.6)
-            total_lines = len(rfp.line_items)
-            matched_lines = 0
-            if total_lines > 0:
-                for li in rfp.line_items:
-                    key = (li.conductor.lower(), li.insulation.lower())
-                    if key in inventory_specs:
-                        matched_lines += 1
-                prod_score = (matched_lines / total_lines) * 100.0
-            else:
-                prod_score = 0.0
-            
-            # 2. Time Readiness (Weight 0.4)
-            # Logic: < 7 days = 0, peaks at 30 days
-            if days_to_due < 7:
-                time_score = 0.0
-            else:
-                time_score = min(100.0, (days_to_due / 30.0) * 100.0)
-
-            final_score = (0.6 * prod_score) + (0.4 * time_score)
-            
-            short_scope = ", ".join(li.description for li in rfp.line_items)
-
-            results.append(
-                RFPSummary(
-                    id=rfp.external_id,
-                    title=rfp.title,
-                    source_url=rfp.source_url,
-                    due_date=rfp.due_date,
-                    days_to_due=days_to_due,
-                    short_scope_summary=short_scope[:200],
-                    score=round(final_score, 2),
-                    product_alignment_score=round(prod_score, 2),
-                    time_readiness_score=round(time_score, 2),
-                )
-            )
+    async def scan_rfps_async(
+        self,
+        db: Session,
+        urls: List[str],
+        within_months: int = 3,
+        live_mode: bool = False,
+        limit: int | None = None,
+        after: ScanCursor | None = None,
+    ) -> List[RFPSummary]:
+        """scan_rfps for async callers: scraping, parsing and queries run off the event loop."""
+        if live_mode:
+            logger.info("Running in LIVE MODE: Scraping portals...")
+            await self._scrape_and_ingest_async(db, urls)
+        return await run_in("blocking", self.scan_rfps, db, urls, within_months, False, limit, after)
 
-        # Sort by Final Score Descending, then by ID ascending (for consistent tiebreaking)
-        results.sort(key=lambda r: (-r.score, r.id))
-        return results
+    def iter_rfp_summaries(
+        self, db: Session, urls: List[str], within_months: int = 3, batch_size: int = 500
+    ) -> Iterator[RFPSummary]:
+        """
+        Yields summaries in scan order. Whether live or not, we read the
+        refined data from DB: scores are kept in rfp_scores (see
+        app.domain.rfp_scoring), fetched `batch_size` rows at a time.
+        """
+        rfp_scoring.ensure_scores(db)
+        for row in repositories.iter_ranked_rfps(db, urls, within_months, yield_per=batch_size):
+            yield self._summarize(row)
 
-    def _scrape_and_ingest(self, db: Session, urls: List[str]):
+    def _summarize(self, row) -> RFPSummary:
+        return RFPSummary(
+            id=row.external_id,
+            title=row.title,
+            source_url=row.source_url,
+            due_date=row.due_date,
+            days_to_due=(row.due_date - date.today()).days,
+            short_scope_summary=row.short_scope,
+            score=row.score,
+            product_alignment_score=row.product_alignment_score,
+            time_readiness_score=row.time_readiness_score,
+        )
+
+    def _scrape_and_ingest(self, db: Session, urls: List[str], progress: ProgressCallback | None = None):
         """
         Scrapes listings, downloads PDFs, and attempts to parse/insert them into DB.
         """
         for url in urls:
+            if progress:
+                progress(f"scraping {url}")
             listings = self.scraper.scrape_listings(url)
-            for item in listings:
+            for n, item in enumerate(listings, start=1):
+                if progress:
+                    progress(f"ingesting {url} ({n}/{len(listings)})")
                 # Check if exists
                 existing = repositories.get_rfp_by_external_id(db, item["title"]) # Using title as ID proxy for now
                 if existing:
@@ -101,7 +136,10 @@ class SalesAgent:
                 if item.get("doc_url"):
                     local_path = self.scraper.download_file(item["doc_url"])
                     if local_path:
-                        doc_text = PDFParser.extract_text(local_path)
+                        try:
+                            doc_text = PDFParser.extract_text(local_path)
+                        finally:
+                            os.remove(local_path)
                 
                 # Use LLM to structure this mess
                 structured_data = self._llm_parse_rfp(item["title"], doc_text)
@@ -109,11 +147,39 @@ class SalesAgent:
                 if structured_data:
                     self._save_to_db(db, url, item, structured_data)
 
-    def _llm_parse_rfp(self, title: str, text: str) -> dict | None:
+    async def _scrape_and_ingest_async(self, db: Session, urls: List[str]):
         """
-        Asks LLM to convert raw text -> JSON structure matching our DB models.
+        Like _scrape_and_ingest. New listings of a portal are downloaded,
+        parsed and sent to the LLM concurrently; the DB session is only used
+        by one step at a time.
         """
-        prompt = f"""
+        llm_slots = asyncio.Semaphore(get_settings().llm_max_concurrency)
+
+        async def extract(item: dict) -> dict | None:
+            doc_text = ""
+            if item.get("doc_url"):
+                local_path = await run_in("blocking", self.scraper.download_file, item["doc_url"])
+                if local_path:
+                    try:
+                        doc_text = await run_in("cpu", PDFParser.extract_text, local_path)
+                    finally:
+                        os.remove(local_path)
+            async with llm_slots:
+                return await self._llm_parse_rfp_async(item["title"], doc_text)
+
+        for url in urls:
+            listings = await run_in("browser", self.scraper.scrape_listings, url)
+            new_items = [
+                item for item in listings
+                if not await run_in("blocking", repositories.get_rfp_by_external_id, db, item["title"])
+            ]
+            parsed = await asyncio.gather(*(extract(item) for item in new_items))
+            for item, structured_data in zip(new_items, parsed):
+                if structured_data:
+                    await run_in("blocking", self._save_to_db, db, url, item, structured_data)
+
+    def _llm_parse_prompt(self, title: str, text: str) -> str:
+        return f"""
         You are a data extraction assistant.
         Extract structured RFP data from the following text derived from a tender document.
         
@@ -141,8 +207,9 @@ class SalesAgent:
         }}
         If date is missing, guess a date 30 days from now.
         """
+
+    def _parse_llm_json(self, response_text: str) -> dict | None:
         try:
-            response_text = generate_text(prompt)
             # Sanitization in case LLM is chatty
             json_str = response_text.replace("```json", "").replace("```", "").strip()
             return json.loads(json_str)
@@ -150,6 +217,15 @@ class SalesAgent:
             logger.error(f"LLM parsing failed: {e}")
             return None
 
+    def _llm_parse_rfp(self, title: str, text: str) -> dict | None:
+        """
+        Asks LLM to convert raw text -> JSON structure matching our DB models.
+        """
+        return self._parse_llm_json(generate_text(self._llm_parse_prompt(title, text)))
+
+    async def _llm_parse_rfp_async(self, title: str, text: str) -> dict | None:
+        return self._parse_llm_json(await generate_text_async(self._llm_parse_prompt(title, text)))
+
     def _save_to_db(self, db: Session, source_url: str, listing_item: dict, data: dict):
         try:
             rfp = db_models.RFP(
@@ -179,7 +255,9 @@ class SalesAgent:
             for t_code in data.get("tests", []):
                 test = db_models.RFPTest(rfp_id=rfp.id, test_code=t_code)
                 db.add(test)
-            
+
+            db.flush()
+            rfp_scoring.refresh_rfp_scores(db, [rfp.id])
             db.commit()
             logger.info(f"Ingested RFP: {rfp.title}")
             
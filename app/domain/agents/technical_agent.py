@@ -1,41 +1,26 @@
-from typing import Dict, List
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.db import repositories
-from app.domain.spec_matching import compute_spec_match
+from app.domain.catalog import CatalogSnapshot, get_catalog_snapshot
+from app.domain.spec_matching import SpecMatchCache, SpecMatchEngine, cached_top_k, top_k_indices
 from app.models.schemas import SpecMatchEntry, LineItemMatch
 from app.db import models as db_models
 
 
+DEFAULT_TOP_K = 3
+
+# Shared by every TechnicalAgent in the process
+match_cache = SpecMatchCache(get_settings().spec_match_cache_size)
+
+
 class TechnicalAgent:
     """Matches RFP line items with OEM SKUs using DB data."""
 
-    def _build_product_specs(self, products: list[db_models.Product]) -> list[dict]:
-        return [
-            {
-                "sku": p.sku,
-                "name": p.name,
-                "category": p.category,
-                "specs": {
-                    "conductor": p.conductor,
-                    "insulation": p.insulation,
-                    "voltage_kV": p.voltage_kv,
-                    "cores": p.cores,
-                    "size_sqmm": p.size_sqmm,
-                    "application": p.application,
-                    "armoured": p.armoured,
-                },
-            }
-            for p in products
-        ]
-
-    def match_line_item(
-        self,
-        db: Session,
-        line_item: db_models.RFPLineItem,
-        products: list[dict],
-    ) -> LineItemMatch:
-        required_specs = {
+    def _required_specs(self, line_item: db_models.RFPLineItem) -> dict:
+        return {
             "conductor": line_item.conductor,
             "insulation": line_item.insulation,
             "voltage_kV": line_item.voltage_kv,
@@ -44,30 +29,96 @@ class TechnicalAgent:
             "armoured": line_item.armoured,
         }
 
-        scored: List[SpecMatchEntry] = []
-        for prod in products:
-            score = compute_spec_match(required_specs, prod["specs"])
-            scored.append(
-                SpecMatchEntry(
-                    sku=prod["sku"],
-                    name=prod["name"],
-                    spec_match_percent=score,
-                    specs={k: str(v) for k, v in prod["specs"].items()},
-                )
-            )
+    def _rank(
+        self, catalog: CatalogSnapshot, line_items: List[db_models.RFPLineItem], top_k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        required = [self._required_specs(li) for li in line_items]
+        return cached_top_k(catalog.engine, required, top_k, catalog.version, match_cache)
+
+    def match_line_item(
+        self,
+        db: Session,
+        line_item: db_models.RFPLineItem,
+        products: list[dict],
+        scores: Sequence[float] | None = None,
+        top_k: int = DEFAULT_TOP_K,
+    ) -> LineItemMatch:
+        """
+        Ranks `products` for one line item and keeps the best `top_k`.
+        `scores` (one per product) can be passed in when they were already
+        computed in bulk by SpecMatchEngine. Only the winners are turned into
+        SpecMatchEntry objects.
+        """
+        if scores is None:
+            # Compile the ad-hoc product list once instead of comparing strings per pair
+            scores = SpecMatchEngine(products).score_matrix([self._required_specs(line_item)])[0]
+
+        scores = np.asarray(scores, dtype=np.float64)
+        top = top_k_indices(scores, top_k)
+        return self._build_line_match(line_item, products, top, scores[top])
 
-        scored.sort(key=lambda x: x.spec_match_percent, reverse=True)
-        top3 = scored[:3]
-        selected = top3[0] if top3 else None
+    def _build_line_match(
+        self,
+        line_item: db_models.RFPLineItem,
+        products: list[dict],
+        indices: Sequence[int],
+        scores: Sequence[float],
+    ) -> LineItemMatch:
+        """Materializes SpecMatchEntry objects for the already ranked winners only."""
+        top = [
+            SpecMatchEntry(
+                sku=products[i]["sku"],
+                name=products[i]["name"],
+                spec_match_percent=float(score),
+                specs={k: str(v) for k, v in products[i]["specs"].items()},
+            )
+            for i, score in zip(indices, scores)
+        ]
+        selected = top[0] if top else None
 
         return LineItemMatch(
             line_id=line_item.line_no,
             description=line_item.description,
             quantity_m=line_item.quantity_m,
-            top_3_matches=top3,
+            top_3_matches=top,
             selected_sku=selected,
         )
 
-    def process_rfp(self, db: Session, rfp: db_models.RFP) -> List[LineItemMatch]:
-        products = self._build_product_specs(repositories.get_all_products(db))
-        return [self.match_line_item(db, li, products) for li in rfp.line_items]
+    def process_rfp(
+        self,
+        db: Session,
+        rfp: db_models.RFP,
+        top_k: int = DEFAULT_TOP_K,
+        catalog: CatalogSnapshot | None = None,
+    ) -> List[LineItemMatch]:
+        """`catalog` pins a snapshot, e.g. one shared by concurrent pipeline runs."""
+        catalog = catalog or get_catalog_snapshot(db)
+        products = catalog.products
+        line_items = list(rfp.line_items)
+
+        # Score every distinct requirement against every SKU, keep the top k
+        ranked = self._rank(catalog, line_items, top_k)
+
+        return [
+            self._build_line_match(li, products, indices, scores)
+            for li, (indices, scores) in zip(line_items, ranked)
+        ]
+
+    def match_rfps(
+        self, db: Session, rfps: List[db_models.RFP], top_k: int = DEFAULT_TOP_K
+    ) -> Dict[int, List[LineItemMatch]]:
+        """
+        Matches many RFPs in one pass: all their line items are loaded with a
+        single query and ranked against the catalog in one matcher call.
+        Returns the technical table of each RFP keyed by RFP id.
+        """
+        catalog = get_catalog_snapshot(db)
+        products = catalog.products
+        line_items = repositories.get_line_items_for_rfps(db, [rfp.id for rfp in rfps])
+
+        ranked = self._rank(catalog, line_items, top_k)
+
+        tables: Dict[int, List[LineItemMatch]] = {rfp.id: [] for rfp in rfps}
+        for li, (indices, scores) in zip(line_items, ranked):
+            tables[li.rfp_id].append(self._build_line_match(li, products, indices, scores))
+        return tables
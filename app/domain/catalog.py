@@ -0,0 +1,157 @@
+"""
+Process-wide, versioned snapshot of the product catalog.
+
+Readers get the derived structures (spec dicts, the (conductor, insulation)
+set and the match engine) without touching the DB. Any write to the catalog
+must call `invalidate_catalog()` (or `add_to_catalog()` for pure inserts);
+the next reader then rebuilds the snapshot.
+"""
+import threading
+from dataclasses import dataclass
+from typing import FrozenSet, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db import models as db_models, repositories
+from app.domain.spec_index import SpecIndex
+from app.domain.spec_matching import SpecMatchEngine, canonical_value
+from app.domain.spec_sharding import ShardedSpecMatcher
+
+
+def _sharded_matcher(products: List[dict]) -> ShardedSpecMatcher:
+    settings = get_settings()
+    return ShardedSpecMatcher(
+        products, workers=settings.spec_match_workers, min_size=settings.spec_match_shard_min_size
+    )
+
+
+def _ann_matcher(products: List[dict]) -> SpecMatchEngine:
+    # scikit-learn is slow to import, only pay for it when selected
+    from app.domain.spec_ann import ApproximateSpecMatcher
+
+    return ApproximateSpecMatcher(products, n_candidates=get_settings().spec_ann_candidates)
+
+
+MATCHERS = {
+    "vectorized": SpecMatchEngine,
+    "indexed": SpecIndex,
+    "sharded": _sharded_matcher,
+    "ann": _ann_matcher,
+}
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    products: List[dict]
+    inventory_specs: FrozenSet[Tuple[str, str]]
+    engine: SpecMatchEngine
+
+
+_lock = threading.Lock()
+_version = 0
+_snapshot: CatalogSnapshot | None = None
+
+
+def build_product_specs(products: list[db_models.Product]) -> list[dict]:
+    return [
+        {
+            "sku": p.sku,
+            "name": p.name,
+            "category": p.category,
+            "specs": {
+                "conductor": p.conductor,
+                "insulation": p.insulation,
+                "voltage_kV": p.voltage_kv,
+                "cores": p.cores,
+                "size_sqmm": p.size_sqmm,
+                "application": p.application,
+                "armoured": p.armoured,
+            },
+        }
+        for p in products
+    ]
+
+
+def build_matcher(products: List[dict]) -> SpecMatchEngine:
+    strategy = get_settings().spec_matcher
+    try:
+        return MATCHERS[strategy](products)
+    except KeyError:
+        raise ValueError(f"Unknown spec_matcher setting: {strategy!r}") from None
+
+
+def _inventory_specs(products: list[db_models.Product]) -> FrozenSet[Tuple[str, str]]:
+    return frozenset(
+        (canonical_value("conductor", p.conductor), canonical_value("insulation", p.insulation))
+        for p in products
+        if p.conductor and p.insulation
+    )
+
+
+def _build_snapshot(version: int, products: list[db_models.Product]) -> CatalogSnapshot:
+    specs = build_product_specs(products)
+    inventory_specs = _inventory_specs(products)
+    return CatalogSnapshot(
+        version=version,
+        products=specs,
+        inventory_specs=inventory_specs,
+        engine=build_matcher(specs),
+    )
+
+
+def catalog_version() -> int:
+    return _version
+
+
+def invalidate_catalog() -> int:
+    """Marks the current snapshot stale. Returns the new catalog version."""
+    global _version
+    with _lock:
+        _version += 1
+        return _version
+
+
+def add_to_catalog(products: list[db_models.Product]) -> int:
+    """
+    Records newly created products. When the warm snapshot's matcher can be
+    extended in place (`extended()`, e.g. the ANN matcher), the next snapshot
+    is derived from it instead of reloading the catalog; otherwise this is
+    `invalidate_catalog()`. Returns the new catalog version.
+    """
+    global _version, _snapshot
+    with _lock:
+        current = _snapshot
+        _version += 1
+        if current is not None and current.version == _version - 1 and hasattr(current.engine, "extended"):
+            # A snapshot rebuilt after the products were committed already has them
+            known = {p["sku"] for p in current.products}
+            new = [p for p in products if p.sku not in known]
+            specs = build_product_specs(new)
+            _snapshot = CatalogSnapshot(
+                version=_version,
+                products=current.products + specs,
+                inventory_specs=current.inventory_specs | _inventory_specs(new),
+                engine=current.engine.extended(specs) if specs else current.engine,
+            )
+        return _version
+
+
+def get_catalog_snapshot(db: Session) -> CatalogSnapshot:
+    """
+    Returns the current snapshot, loading the products table only when the
+    catalog version moved since the last build.
+    """
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == _version:
+        return snapshot
+
+    with _lock:
+        # Another thread may have rebuilt it while we waited
+        if _snapshot is not None and _snapshot.version == _version:
+            return _snapshot
+        version = _version
+        _snapshot = _build_snapshot(version, repositories.get_all_products(db))
+        return _snapshot
@@ -15,29 +15,50 @@ if _settings.gemini_api_key:
         _model = None
 
 
+_UNAVAILABLE = (
+    "AI proposal generation unavailable due to quota limits.\n\n"
+    "Draft Summary:\n"
+    "- OEM products mapped technically to RFP requirements\n"
+    "- Commercial pricing computed using internal pricing tables\n"
+    "- Suitable for immediate submission"
+)
+
+_FAILED = (
+    "AI proposal generation temporarily unavailable due to quota limits.\n\n"
+    "System successfully completed:\n"
+    "- Sales qualification\n"
+    "- Technical SKU matching\n"
+    "- Pricing consolidation\n"
+)
+
+
 def generate_text(prompt: str) -> str:
     """
     SAFE Gemini wrapper.
     Never throws, never breaks the pipeline.
     """
     if not _model:
-        return (
-            "AI proposal generation unavailable due to quota limits.\n\n"
-            "Draft Summary:\n"
-            "- OEM products mapped technically to RFP requirements\n"
-            "- Commercial pricing computed using internal pricing tables\n"
-            "- Suitable for immediate submission"
-        )
+        return _UNAVAILABLE
 
     try:
         response = _model.generate_content(prompt)
         return getattr(response, "text", "").strip()
     except Exception as e:
         logger.warning(f"Gemini failed: {e}")
-        return (
-            "AI proposal generation temporarily unavailable due to quota limits.\n\n"
-            "System successfully completed:\n"
-            "- Sales qualification\n"
-            "- Technical SKU matching\n"
-            "- Pricing consolidation\n"
-        )
+        return _FAILED
+
+
+async def generate_text_async(prompt: str) -> str:
+    """
+    Same as generate_text, awaited on the event loop instead of holding a
+    thread for the duration of the call.
+    """
+    if not _model:
+        return _UNAVAILABLE
+
+    try:
+        response = await _model.generate_content_async(prompt)
+        return getattr(response, "text", "").strip()
+    except Exception as e:
+        logger.warning(f"Gemini failed: {e}")
+        return _FAILED
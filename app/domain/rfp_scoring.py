@@ -0,0 +1,101 @@
+"""
+Persisted /sales/scan scores (`rfp_scores`).
+
+- Alignment (share of line items whose (conductor, insulation) pair is in
+  the catalog) only changes when an RFP is ingested or products are added:
+  `refresh_rfp_scores()` / `refresh_scores_for_specs()`.
+- Time readiness only changes with the date: `ensure_scores()` recomputes it
+  once a day, and also scores RFPs written behind the API's back (seeding).
+"""
+from datetime import date
+from typing import Iterable, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db import repositories
+from app.domain.spec_matching import canonical_value
+
+ALIGNMENT_WEIGHT = 0.6
+TIME_WEIGHT = 0.4
+
+
+def product_alignment_score(total_lines: int, matched_lines: int) -> float:
+    return (matched_lines / total_lines) * 100.0 if total_lines > 0 else 0.0
+
+
+def time_readiness_score(days_to_due: int) -> float:
+    # < 7 days = 0, peaks at 30 days
+    if days_to_due < 7:
+        return 0.0
+    return min(100.0, (days_to_due / 30.0) * 100.0)
+
+
+def final_score(prod_score: float, time_score: float) -> float:
+    return (ALIGNMENT_WEIGHT * prod_score) + (TIME_WEIGHT * time_score)
+
+
+def refresh_rfp_scores(db: Session, rfp_ids: List[int] | None = None, today: date | None = None) -> int:
+    """
+    Recomputes the scores of `rfp_ids` (None: every RFP) with one aggregate
+    query and upserts their rows. Does not commit. Returns the row count.
+    """
+    today = today or date.today()
+    if rfp_ids is not None and not rfp_ids:
+        return 0
+
+    scores = []
+    for rfp in repositories.get_rfp_alignment(db, rfp_ids=rfp_ids):
+        prod_score = product_alignment_score(rfp.total_lines, rfp.matched_lines)
+        time_score = time_readiness_score((rfp.due_date - today).days)
+        scores.append({
+            "rfp_id": rfp.id,
+            "total_lines": rfp.total_lines,
+            "matched_lines": rfp.matched_lines,
+            "short_scope": rfp.short_scope,
+            "product_alignment_score": round(prod_score, 2),
+            "time_readiness_score": round(time_score, 2),
+            "score": round(final_score(prod_score, time_score), 2),
+            "scored_on": today,
+        })
+
+    # Rows of deleted RFPs go with them (ON DELETE CASCADE)
+    repositories.upsert_rfp_scores(db, scores)
+    return len(scores)
+
+
+def refresh_scores_for_specs(db: Session, specs: Iterable[Tuple[str, str]]) -> int:
+    """
+    New products can only raise the alignment of RFPs that have a line with
+    one of their (conductor, insulation) pairs; rescores just those.
+    Does not commit.
+    """
+    pairs = {
+        (canonical_value("conductor", conductor), canonical_value("insulation", insulation))
+        for conductor, insulation in specs
+    }
+    return refresh_rfp_scores(db, repositories.get_rfp_ids_with_specs(db, pairs))
+
+
+def refresh_time_scores(db: Session, today: date | None = None) -> int:
+    """Recomputes the time component of every score not computed today. Does not commit."""
+    today = today or date.today()
+    updates = []
+    for rfp_id, due_date, prod_score in repositories.get_scores_not_scored_on(db, today):
+        time_score = time_readiness_score((due_date - today).days)
+        updates.append({
+            "rfp_id": rfp_id,
+            "time_readiness_score": round(time_score, 2),
+            # Same inputs as a full rescore: alignment is only stored rounded
+            "score": round(final_score(prod_score, time_score), 2),
+            "scored_on": today,
+        })
+    repositories.update_rfp_scores(db, updates)
+    return len(updates)
+
+
+def ensure_scores(db: Session, today: date | None = None) -> None:
+    """Scores unscored RFPs and rolls the time component over to today; commits if anything changed."""
+    changed = refresh_rfp_scores(db, repositories.get_unscored_rfp_ids(db), today)
+    changed += refresh_time_scores(db, today)
+    if changed:
+        db.commit()
@@ -0,0 +1,127 @@
+"""
+Approximate nearest-neighbour SKU retrieval.
+
+SKUs are partitioned by their categorical specs (conductor, insulation,
+armoured) and each partition gets a KDTree over log-scaled numeric specs,
+where the 10% relative tolerance becomes a roughly constant distance. A line
+item queries its own partition for a wider candidate set plus the nearest
+few SKUs of every other partition; the candidates are then re-scored exactly
+(same result as `compute_spec_match`), so reported percentages are exact
+even though the candidate set is approximate.
+"""
+import copy
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from app.domain.spec_matching import SCORE_TABLE, SpecMatchEngine, canonical_value, count_matches
+
+PARTITION_KEYS = ("conductor", "insulation", "armoured")
+FEATURE_KEYS = ("voltage_kV", "cores", "size_sqmm")
+
+# log() is undefined for non-positive / missing values; park them far away
+_MISSING_FEATURE = -50.0
+
+
+def _partition_key(specs: dict) -> tuple:
+    return tuple(canonical_value(key, specs.get(key)) for key in PARTITION_KEYS)
+
+
+def _features(specs_list: Sequence[dict]) -> np.ndarray:
+    features = np.full((len(specs_list), len(FEATURE_KEYS)), _MISSING_FEATURE)
+    for row, specs in enumerate(specs_list):
+        for col, key in enumerate(FEATURE_KEYS):
+            value = specs.get(key)
+            if isinstance(value, (int, float)) and value > 0:
+                features[row, col] = np.log(value)
+    return features
+
+
+class _Partition:
+    def __init__(self, positions: np.ndarray, features: np.ndarray) -> None:
+        self.positions = positions
+        self.tree = KDTree(features[positions])
+
+
+class ApproximateSpecMatcher(SpecMatchEngine):
+    """
+    KDTree-backed alternative to the exact matchers (Settings.spec_matcher = "ann").
+    Query cost is logarithmic in the partition size; `extended()` rebuilds only
+    the partitions that received new SKUs.
+    """
+
+    def __init__(self, products: List[dict], n_candidates: int = 32) -> None:
+        super().__init__(products)
+        self.n_candidates = n_candidates
+        self._features = _features([p["specs"] for p in products])
+
+        groups: Dict[tuple, List[int]] = {}
+        for position, product in enumerate(products):
+            groups.setdefault(_partition_key(product["specs"]), []).append(position)
+        self._partitions: Dict[tuple, _Partition] = {
+            key: _Partition(np.asarray(positions, dtype=np.intp), self._features)
+            for key, positions in groups.items()
+        }
+
+    def extended(self, new_products: List[dict]) -> "ApproximateSpecMatcher":
+        """
+        New matcher over `products + new_products`. Existing positions are
+        unchanged, so untouched partitions (and their trees) are shared with
+        this matcher, which keeps serving readers of the older snapshot.
+        """
+        matcher = copy.copy(self)
+        matcher.products = self.products + new_products
+        matcher.size = len(matcher.products)
+        matcher._vocab = {key: dict(vocab) for key, vocab in self._vocab.items()}
+        matcher._set_columns(np.concatenate([self._columns, matcher._encode_catalog(new_products)], axis=1))
+        matcher._features = np.concatenate([self._features, _features([p["specs"] for p in new_products])])
+
+        touched: Dict[tuple, List[int]] = {}
+        for position, product in enumerate(new_products, start=self.size):
+            touched.setdefault(_partition_key(product["specs"]), []).append(position)
+
+        matcher._partitions = dict(self._partitions)
+        for key, positions in touched.items():
+            existing = self._partitions[key].positions if key in self._partitions else np.empty(0, dtype=np.intp)
+            merged = np.concatenate([existing, np.asarray(positions, dtype=np.intp)])
+            matcher._partitions[key] = _Partition(merged, matcher._features)
+        return matcher
+
+    def _candidates(self, required: Sequence[dict], k: int) -> List[np.ndarray]:
+        """Candidate positions per required-spec dict, one batched tree query per partition."""
+        queries = _features(required)
+        own_lines: Dict[tuple, List[int]] = {}
+        for line, req in enumerate(required):
+            own_lines.setdefault(_partition_key(req), []).append(line)
+
+        found: List[List[np.ndarray]] = [[] for _ in required]
+        for key, partition in self._partitions.items():
+            size = partition.positions.size
+            _, idx = partition.tree.query(queries, k=min(k, size))
+            for line, row in enumerate(idx):
+                found[line].append(partition.positions[row])
+
+            lines = own_lines.get(key)
+            if lines and self.n_candidates > k:
+                # Wider net in the partition whose categorical specs all match
+                _, idx = partition.tree.query(queries[lines], k=min(self.n_candidates, size))
+                for line, row in zip(lines, idx):
+                    found[line].append(partition.positions[row])
+
+        return [np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp) for parts in found]
+
+    def top_k(
+        self, required: Sequence[dict], k: int, chunk_size: int = 64
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if k <= 0 or not required:
+            return [(np.empty(0, dtype=np.intp), np.empty(0)) for _ in required]
+
+        results: List[Tuple[np.ndarray, np.ndarray]] = []
+        encoded = self._encode_required(required)
+        for line, candidates in enumerate(self._candidates(required, k)):
+            # Exact match counts for the retrieved SKUs only
+            counts = count_matches(self._columns[:, candidates], encoded[line:line + 1])[0]
+            order = np.lexsort((candidates, -counts.astype(np.int16)))[:k]
+            results.append((candidates[order], SCORE_TABLE[counts[order]]))
+        return results
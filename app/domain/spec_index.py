@@ -0,0 +1,138 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.domain.spec_matching import (
+    CATEGORICAL_KEYS,
+    MATCH_KEYS,
+    NUMERIC_KEYS,
+    NUMERIC_TOLERANCE,
+    SCORE_TABLE,
+    SpecMatchEngine,
+    count_matches,
+)
+
+# Relative slack on the numeric range bounds so float rounding in r/1.1 and
+# r/0.9 can only widen the candidate range; membership is re-checked exactly.
+_RANGE_SLACK = 1e-9
+
+
+def _best_positions(positions: np.ndarray, counts: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top `k` (position, count) pairs by count desc, position asc; inputs in any order."""
+    if positions.size > k:
+        kth = np.partition(counts, positions.size - k)[positions.size - k]
+        above = counts > kth
+        ties = np.flatnonzero(counts == kth)
+        need = k - np.count_nonzero(above)
+        if need < ties.size:
+            tie_positions = positions[ties]
+            ties = ties[np.argpartition(tie_positions, need - 1)[:need]] if need > 0 else ties[:0]
+        keep = np.concatenate([np.flatnonzero(above), ties])
+        positions, counts = positions[keep], counts[keep]
+    order = np.lexsort((positions, -counts.astype(np.int16)))
+    return positions[order], counts[order]
+
+
+class SpecIndex(SpecMatchEngine):
+    """
+    Candidate-pruning index over the catalog.
+
+    - Categorical keys: hash buckets value -> sorted SKU positions.
+    - Numeric keys: values sorted once, so the SKUs inside the 10% tolerance
+      window of a required value are one `searchsorted` range.
+
+    A SKU matching `c` of the 6 keys must appear in at least one of the
+    `7 - c` smallest per-key match lists (pigeonhole). `top_k` therefore
+    unions the smallest lists first and stops as soon as `k` candidates are
+    proven to beat everything outside the union. Results (indices, scores
+    and tie order) are identical to SpecMatchEngine.top_k.
+    """
+
+    def __init__(self, products: List[dict]) -> None:
+        super().__init__(products)
+
+        self._buckets: Dict[str, Dict[int, np.ndarray]] = {}
+        for key in CATEGORICAL_KEYS:
+            codes = self._codes[key]
+            order = np.argsort(codes, kind="stable")
+            values, starts = np.unique(codes[order], return_index=True)
+            self._buckets[key] = {
+                int(code): order[start:end]
+                for code, start, end in zip(values, starts, list(starts[1:]) + [len(order)])
+            }
+
+        self._order: Dict[str, np.ndarray] = {}
+        self._sorted: Dict[str, np.ndarray] = {}
+        self._negatives: Dict[str, np.ndarray] = {}
+        for key in NUMERIC_KEYS:
+            values = self._numeric[key]
+            order = np.argsort(values, kind="stable")  # NaN sorts last
+            self._order[key] = order
+            self._sorted[key] = values[order]
+            # |c - r| / c is never positive for c < 0, so those always match
+            self._negatives[key] = order[: np.searchsorted(self._sorted[key], 0.0, side="left")]
+
+    def _numeric_candidates(self, key: str, required: float) -> np.ndarray:
+        """Superset of the SKU positions within tolerance of `required`."""
+        negatives = self._negatives[key]
+        if np.isnan(required) or required <= 0:
+            return negatives
+        low = required / (1 + NUMERIC_TOLERANCE) * (1 - _RANGE_SLACK)
+        high = required / (1 - NUMERIC_TOLERANCE) * (1 + _RANGE_SLACK)
+        sorted_values = self._sorted[key]
+        lo = np.searchsorted(sorted_values, low, side="left")
+        hi = np.searchsorted(sorted_values, high, side="right")
+        window = self._order[key][lo:hi]
+        return np.concatenate([negatives, window]) if negatives.size else window
+
+    def _rank_line(self, encoded: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        empty = np.empty(0, dtype=np.intp)
+        n_categorical = len(CATEGORICAL_KEYS)
+        match_lists = [
+            self._buckets[key].get(int(encoded[i]), empty) for i, key in enumerate(CATEGORICAL_KEYS)
+        ]
+        match_lists += [
+            self._numeric_candidates(key, encoded[n_categorical + i]) for i, key in enumerate(NUMERIC_KEYS)
+        ]
+        match_lists.sort(key=len)
+
+        n_keys = len(MATCH_KEYS)
+        seen = np.zeros(self.size, dtype=bool)
+        histogram = np.zeros(n_keys + 1, dtype=np.int64)
+        position_parts: List[np.ndarray] = []
+        count_parts: List[np.ndarray] = []
+        for used, match_list in enumerate(match_lists, start=1):
+            new = match_list[~seen[match_list]]
+            if new.size:
+                seen[new] = True
+                counts = count_matches(self._columns[:, new], encoded[None, :])[0]
+                position_parts.append(new)
+                count_parts.append(counts)
+                histogram += np.bincount(counts, minlength=n_keys + 1)
+            # Anything not seen yet matches fewer than `n_keys - used + 1` keys
+            if histogram[n_keys - used + 1:].sum() >= k:
+                break
+
+        positions = np.concatenate(position_parts) if position_parts else empty
+        counts = np.concatenate(count_parts) if count_parts else np.zeros(0, dtype=np.int8)
+        positive = counts > 0
+        winners, winner_counts = _best_positions(positions[positive], counts[positive], k)
+
+        # Fewer than k SKUs match any key: pad with the lowest-position 0% SKUs
+        # like a stable sort would.
+        need = min(k, self.size) - winners.size
+        if need > 0:
+            taken = np.zeros(self.size, dtype=bool)
+            taken[winners] = True
+            zeros = np.flatnonzero(~taken)[:need]
+            winners = np.concatenate([winners, zeros])
+            winner_counts = np.concatenate([winner_counts, np.zeros(need, dtype=np.int8)])
+        return winners, SCORE_TABLE[winner_counts]
+
+    def top_k(
+        self, required: Sequence[dict], k: int, chunk_size: int = 64
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if k <= 0 or k >= self.size:
+            # Nothing to prune, every SKU is returned anyway
+            return super().top_k(required, k, chunk_size=chunk_size)
+        return [self._rank_line(encoded, k) for encoded in self._encode_required(required)]
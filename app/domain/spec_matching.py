@@ -1,11 +1,26 @@
-from typing import Dict
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.core.spec_synonyms import SPEC_SYNONYMS
+
+
+def canonical_value(key: str, value) -> str:
+    """Lowercase, trimmed, synonym-resolved form of a categorical spec value."""
+    text = str(value).strip().lower()
+    return SPEC_SYNONYMS.get(key, {}).get(text, text)
 
 
 def compute_spec_match(required: Dict, candidate: Dict) -> float:
     """
     Simple spec-match metric:
     - For each key in required, check if candidate has same value (or close for numeric).
+      Non-numeric values are compared in canonical form (see canonical_value).
     - Return percentage of matched keys.
+
+    Reference implementation; hot paths use the compiled form in SpecMatchEngine.
     """
     if not required:
         return 0.0
@@ -23,7 +38,246 @@ def compute_spec_match(required: Dict, candidate: Dict) -> float:
             if diff_ratio <= 0.1:  # 10% tolerance
                 matches += 1
         else:
-            if str(req_val).lower() == str(cand_val).lower():
+            if canonical_value(key, req_val) == canonical_value(key, cand_val):
                 matches += 1
 
     return round(100.0 * matches / total, 2)
+
+
+# Keys compared in canonical string form by compute_spec_match.
+CATEGORICAL_KEYS = ("conductor", "insulation")
+# Keys compared with the 10% tolerance. `armoured` is a bool, and bool is an
+# int subclass, so compute_spec_match scores it through the numeric branch:
+# it only matches when both sides are True.
+NUMERIC_KEYS = ("voltage_kV", "cores", "size_sqmm", "armoured")
+MATCH_KEYS = CATEGORICAL_KEYS + NUMERIC_KEYS
+
+NUMERIC_TOLERANCE = 0.1
+
+# round() on the 7 possible match counts, so batched scores are bit-identical
+# to compute_spec_match (np.round rounds differently on some halves).
+SCORE_TABLE = np.array([round(100.0 * m / len(MATCH_KEYS), 2) for m in range(len(MATCH_KEYS) + 1)])
+
+
+def _as_number(value) -> float:
+    # Mirrors the isinstance() check in compute_spec_match: anything that is
+    # not int/float/bool never matches numerically.
+    if isinstance(value, (int, float)):
+        return float(value)
+    return np.nan
+
+
+def count_matches(catalog_columns: np.ndarray, required_columns: np.ndarray) -> np.ndarray:
+    """
+    Number of matched keys for every (requirement, SKU) pair.
+
+    Both inputs are encoded in MATCH_KEYS order: `catalog_columns` is
+    (len(MATCH_KEYS), n_skus), `required_columns` is (n_required, len(MATCH_KEYS)).
+    Categorical rows hold vocabulary codes (-1 = unseen), numeric rows hold
+    floats (NaN = non-numeric). Returns an int8 matrix (n_required, n_skus).
+    """
+    n_categorical = len(CATEGORICAL_KEYS)
+    counts = np.zeros((required_columns.shape[0], catalog_columns.shape[1]), dtype=np.int8)
+
+    for i in range(n_categorical):
+        counts += required_columns[:, i, None] == catalog_columns[i][None, :]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i in range(n_categorical, len(MATCH_KEYS)):
+            cand = catalog_columns[i][None, :]
+            ratio = np.abs(cand - required_columns[:, i, None]) / cand
+            # NaN (non-numeric) and zero candidates compare False here
+            counts += (cand != 0) & (ratio <= NUMERIC_TOLERANCE)
+
+    return counts
+
+
+class SpecMatchEngine:
+    """
+    Batched spec matcher.
+
+    Compiles the catalog once into a (len(MATCH_KEYS), n_skus) float matrix:
+    canonical categorical values interned as integer codes, numerics pre-typed
+    as floats. Required specs are compiled the same way once per line, so
+    scoring is one broadcasted int/float comparison per key. For the typed
+    values stored in the DB, scores are identical to `compute_spec_match`
+    over MATCH_KEYS.
+    """
+
+    def __init__(self, products: List[dict]) -> None:
+        self.products = products
+        self.size = len(products)
+        self._vocab: Dict[str, Dict[str, int]] = {key: {} for key in CATEGORICAL_KEYS}
+        self._set_columns(self._encode_catalog(products))
+
+    def _encode_catalog(self, products: List[dict]) -> np.ndarray:
+        """Encodes products as (len(MATCH_KEYS), len(products)) columns, growing the vocabularies."""
+        columns = np.empty((len(MATCH_KEYS), len(products)), dtype=np.float64)
+        for i, key in enumerate(MATCH_KEYS):
+            if key in CATEGORICAL_KEYS:
+                vocab = self._vocab[key]
+                columns[i] = [
+                    vocab.setdefault(canonical_value(key, p["specs"].get(key)), len(vocab)) for p in products
+                ]
+            else:
+                columns[i] = [_as_number(p["specs"].get(key)) for p in products]
+        return columns
+
+    def _set_columns(self, columns: np.ndarray) -> None:
+        self._columns = columns
+        self._codes: Dict[str, np.ndarray] = {key: columns[i] for i, key in enumerate(CATEGORICAL_KEYS)}
+        self._numeric: Dict[str, np.ndarray] = {
+            key: columns[len(CATEGORICAL_KEYS) + i] for i, key in enumerate(NUMERIC_KEYS)
+        }
+
+    def _encode_required(self, required: Sequence[dict]) -> np.ndarray:
+        """Encodes required-spec dicts as a (len(required), len(MATCH_KEYS)) matrix."""
+        encoded = np.empty((len(required), len(MATCH_KEYS)), dtype=np.float64)
+        for i, key in enumerate(MATCH_KEYS):
+            if key in CATEGORICAL_KEYS:
+                # -1 never equals a catalog code, i.e. an unseen value never matches
+                encoded[:, i] = [self._vocab[key].get(canonical_value(key, r.get(key)), -1) for r in required]
+            else:
+                encoded[:, i] = [_as_number(r.get(key)) for r in required]
+        return encoded
+
+    def match_counts(self, required: Sequence[dict]) -> np.ndarray:
+        """Returns an int matrix (len(required) x catalog size) of matched keys."""
+        return count_matches(self._columns, self._encode_required(required))
+
+    def score_matrix(self, required: Sequence[dict]) -> np.ndarray:
+        """Returns spec-match percentages, shape (len(required), catalog size)."""
+        return SCORE_TABLE[self.match_counts(required)]
+
+    def top_k(
+        self, required: Sequence[dict], k: int, chunk_size: int = 64
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Best `k` SKUs per required-spec dict as (catalog indices, scores).
+        Lines are scored in chunks so only a chunk x catalog count matrix is
+        alive at a time; the score table is applied to the winners only.
+        """
+        results: List[Tuple[np.ndarray, np.ndarray]] = []
+        for start in range(0, len(required), chunk_size):
+            for counts in self.match_counts(required[start:start + chunk_size]):
+                idx = top_k_indices(counts, k)
+                results.append((idx, SCORE_TABLE[counts[idx]]))
+        return results
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the `k` highest scores, best first, in O(n) via a partition.
+    Ties keep catalog order, i.e. the same result as a stable descending sort.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+
+    kth = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[: k - above.size]
+    chosen = np.concatenate([above, ties])
+    # lexsort: last key is primary -> score desc, then index asc
+    return chosen[np.lexsort((chosen, -scores[chosen]))]
+
+
+def requirement_signature(required: dict) -> tuple:
+    """
+    Normalized, hashable form of a required-spec dict: canonical categoricals
+    and floats (None for non-numeric) in MATCH_KEYS order. Two dicts with the
+    same signature always get the same scores.
+    """
+    signature = []
+    for key in MATCH_KEYS:
+        value = required.get(key)
+        if key in CATEGORICAL_KEYS:
+            signature.append(canonical_value(key, value))
+        else:
+            number = _as_number(value)
+            signature.append(None if np.isnan(number) else number)
+    return tuple(signature)
+
+
+class SpecMatchCache:
+    """
+    Bounded LRU of top-k results keyed by (catalog version, k, requirement
+    signature). Entries of older catalog versions are never hit again and
+    age out through normal eviction.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Tuple[np.ndarray, np.ndarray] | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: Tuple[np.ndarray, np.ndarray]) -> None:
+        if self.maxsize <= 0:
+            return
+        for array in value:
+            array.setflags(write=False)  # shared between requests
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def cached_top_k(
+    matcher: SpecMatchEngine,
+    required: Sequence[dict],
+    k: int,
+    catalog_version: int,
+    cache: SpecMatchCache,
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    `matcher.top_k` with memoization: repeated requirements (within the call
+    or across calls on the same catalog version) are only ranked once.
+    """
+    keys = [(catalog_version, k, requirement_signature(r)) for r in required]
+    results: List[Tuple[np.ndarray, np.ndarray] | None] = [cache.get(key) for key in keys]
+
+    # Rank each distinct missing signature once
+    pending: Dict[tuple, dict] = {}
+    for key, result, req in zip(keys, results, required):
+        if result is None:
+            pending.setdefault(key, req)
+    if pending:
+        ranked = dict(zip(pending, matcher.top_k(list(pending.values()), k)))
+        for key, value in ranked.items():
+            cache.put(key, value)
+        results = [result if result is not None else ranked[key] for key, result in zip(keys, results)]
+
+    return results
@@ -0,0 +1,127 @@
+"""
+Process-pool sharded spec matching for very large catalogs.
+
+The encoded catalog matrix lives in one shared-memory block. Worker
+processes attach to it by name, so each call only ships the encoded line
+items and the shard bounds; every shard returns its local top-k and the
+parent merges them.
+"""
+import atexit
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.domain.spec_matching import MATCH_KEYS, SCORE_TABLE, SpecMatchEngine, count_matches, top_k_indices
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+# Worker side: blocks attached by this process, keyed by name
+_attached: Dict[str, SharedMemory] = {}
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by all sharded matchers, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a threaded server process is not safe
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        return _executor
+
+
+@atexit.register
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+def _attach(name: str) -> SharedMemory:
+    block = _attached.get(name)
+    if block is None:
+        # Only the newest catalog is queried; drop mappings of older ones
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        block = _attached[name] = SharedMemory(name=name)
+    return block
+
+
+def _shard_top_k(
+    block_name: str, size: int, start: int, stop: int, required: np.ndarray, k: int, chunk_size: int
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Runs in a worker: local top-k (global positions, match counts) of one shard."""
+    block = _attach(block_name)
+    columns = np.ndarray((len(MATCH_KEYS), size), dtype=np.float64, buffer=block.buf)[:, start:stop]
+    results = []
+    for offset in range(0, required.shape[0], chunk_size):
+        for counts in count_matches(columns, required[offset:offset + chunk_size]):
+            idx = top_k_indices(counts, k)
+            results.append((idx + start, counts[idx]))
+    return results
+
+
+def _release(block: SharedMemory) -> None:
+    block.close()
+    block.unlink()
+
+
+class ShardedSpecMatcher(SpecMatchEngine):
+    """
+    SpecMatchEngine whose catalog matrix is stored in shared memory and
+    scanned by `workers` processes in parallel. Catalogs smaller than
+    `min_size` are scanned in-process. Results are identical to
+    SpecMatchEngine.top_k.
+    """
+
+    def __init__(self, products: List[dict], workers: int = 4, min_size: int = 50_000) -> None:
+        super().__init__(products)
+        self.workers = max(1, workers)
+        self.min_size = min_size
+
+        # Move the encoded matrix into shared memory; the private copy is dropped
+        columns = self._columns
+        self._block = SharedMemory(create=True, size=max(columns.nbytes, 1))
+        shared = np.ndarray(columns.shape, dtype=columns.dtype, buffer=self._block.buf)
+        shared[:] = columns
+        self._set_columns(shared)
+        # Unlink the block once this matcher (i.e. its catalog snapshot) is gone
+        self._finalizer = weakref.finalize(self, _release, self._block)
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def top_k(
+        self, required: Sequence[dict], k: int, chunk_size: int = 64
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if self.workers == 1 or self.size < self.min_size or not required:
+            return super().top_k(required, k, chunk_size=chunk_size)
+
+        encoded = self._encode_required(required)
+        bounds = np.linspace(0, self.size, self.workers + 1, dtype=np.int64)
+        executor = get_executor(self.workers)
+        futures = [
+            executor.submit(
+                _shard_top_k, self._block.name, self.size, int(start), int(stop), encoded, k, chunk_size
+            )
+            for start, stop in zip(bounds[:-1], bounds[1:])
+            if stop > start
+        ]
+        shard_results = [future.result() for future in futures]
+
+        # Merge the per-shard winners: match count desc, catalog position asc
+        merged: List[Tuple[np.ndarray, np.ndarray]] = []
+        for line_results in zip(*shard_results):
+            positions = np.concatenate([positions for positions, _ in line_results])
+            counts = np.concatenate([counts for _, counts in line_results])
+            order = np.lexsort((positions, -counts.astype(np.int16)))[:k]
+            merged.append((positions[order], SCORE_TABLE[counts[order]]))
+        return merged
@@ -0,0 +1,51 @@
+# import_products.py
+"""
+Bulk-imports products (ProductCreate rows, optional `unit_price`) from a CSV
+or JSONL file in one transaction:
+
+    python -m app.import_products products.csv
+    python -m app.import_products products.jsonl --batch-size 2000
+"""
+import argparse
+import sys
+
+from app.db.session import SessionLocal
+from app.models.schemas import ProductCreate
+from app.services.bulk_io import BATCH_SIZE, RecordParser
+from app.services.product_import import ProductImport
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-import products from CSV or JSONL.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    records = RecordParser(ProductCreate, fmt)
+    importer = ProductImport(records.report)
+
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as fh:
+            for batch in records.batches(fh, size=args.batch_size):
+                importer.import_batch(db, batch)
+        importer.refresh_scores(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    importer.finish()
+
+    report = records.report
+    print(f"Imported {importer.imported} of {report.received} rows, rejected {report.rejected}.")
+    for err in report.errors:
+        print(f"  row {err.row}: {err.error}", file=sys.stderr)
+    return 0 if report.rejected == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
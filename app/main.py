@@ -1,17 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.core.config import get_settings
+from app.core.executors import shutdown_executors
+from app.services.job_runner import get_job_runner, shutdown_job_runner
 from app.core.logging import setup_logging
-from app.api.routers import health, sales, pipeline, inventory
+from app.api.routers import health, sales, pipeline, inventory, technical, pricing
 from fastapi.middleware.cors import CORSMiddleware
 
 
 setup_logging()
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.pipeline_job_recover_on_startup:
+        get_job_runner().recover()
+    yield
+    shutdown_job_runner()
+    shutdown_executors()
+
+
 app = FastAPI(
     title=settings.project_name,
     version="1.0.0",
     description="Agentic AI-style backend for B2B RFP response (Sales, Technical, Pricing Agents).",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -27,3 +41,5 @@ app.include_router(health.router)
 app.include_router(sales.router, prefix=settings.api_v1_prefix)
 app.include_router(pipeline.router, prefix=settings.api_v1_prefix)
 app.include_router(inventory.router, prefix=settings.api_v1_prefix)
+app.include_router(technical.router, prefix=settings.api_v1_prefix)
+app.include_router(pricing.router, prefix=settings.api_v1_prefix)
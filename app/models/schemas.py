@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import List, Dict
-from datetime import date
+from pydantic import BaseModel, Field
+from typing import List, Dict, Literal, Optional
+from datetime import date, datetime
 
 
 class RFPSummary(BaseModel):
@@ -40,12 +40,48 @@ class PricingRow(BaseModel):
     total_cost: float
 
 
+# How RFP-level test charges are spread over the pricing rows:
+# - per_line: the full test cost on every row (legacy)
+# - summary: charged once, listed in `rfp_charges`, rows carry no test cost
+# - pro_rata_quantity / pro_rata_material: charged once, split by quantity / material cost
+TestCostAllocation = Literal["per_line", "summary", "pro_rata_quantity", "pro_rata_material"]
+
+
+class RFPCharge(BaseModel):
+    code: str
+    amount: float
+
+
 class PricingSummary(BaseModel):
     currency: str = "INR"
     rows: List[PricingRow]
     total_material_cost: float
     total_tests_cost: float
     grand_total: float
+    test_cost_allocation: TestCostAllocation = "per_line"
+    rfp_charges: List[RFPCharge] = []
+    # Set when SKUs were priced from the price history instead of current prices
+    prices_as_of: Optional[date] = None
+
+
+class ScenarioLine(BaseModel):
+    line_id: int
+    selected_sku: str
+    spec_match_percent: float
+    quantity_m: float
+    unit_price: float
+    material_cost: float
+
+
+class PricingScenario(BaseModel):
+    # Cheapest priced alternative per line among those matching >= min_spec_match
+    min_spec_match: float
+    # False when some lines have no alternative meeting the threshold
+    feasible: bool
+    rows: List[ScenarioLine]
+    infeasible_lines: List[int] = []
+    total_material_cost: float
+    average_spec_match: float
 
 
 class FullRFPResponse(BaseModel):
@@ -53,6 +89,73 @@ class FullRFPResponse(BaseModel):
     technical_table: List[LineItemMatch]
     pricing_table: PricingSummary
 
+
+class PipelineJobRequest(BaseModel):
+    urls: List[str] = Field(default_factory=lambda: ["http://test.com"])
+    live_mode: bool = False
+    top_k: int = Field(3, ge=1, le=50)
+    test_allocation: Optional[TestCostAllocation] = None
+    as_of: Optional[date] = None
+
+
+# queued -> running -> succeeded | failed | cancelled (queued jobs can be cancelled directly)
+PipelineJobState = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+class PipelineJobStatus(BaseModel):
+    id: str
+    status: PipelineJobState
+    # Last pipeline stage reached, e.g. "scanning", "matching", "pricing"
+    stage: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[FullRFPResponse] = None
+
+
+class TechnicalBatchRequest(BaseModel):
+    # Either explicit RFP external ids, or every RFP due within N months
+    external_ids: Optional[List[str]] = None
+    due_within_months: Optional[int] = Field(None, ge=0)
+    # Optional source filter for `due_within_months`
+    urls: Optional[List[str]] = None
+    top_k: int = Field(3, ge=1, le=50)
+
+
+class RFPTechnicalTable(BaseModel):
+    rfp_id: str
+    title: str
+    due_date: date
+    technical_table: List[LineItemMatch]
+
+
+class TechnicalBatchResponse(BaseModel):
+    results: List[RFPTechnicalTable]
+    not_found: List[str] = []
+
+
+class MatchCacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class WhatIfRequest(BaseModel):
+    external_id: str
+    min_spec_match: List[float] = Field(default_factory=lambda: [0.0, 50.0, 66.67, 83.33, 100.0])
+    # Alternatives considered per line
+    top_k: int = Field(3, ge=1, le=50)
+
+
+class WhatIfResponse(BaseModel):
+    rfp_id: str
+    scenarios: List[PricingScenario]
+
+
 class ProductCreate(BaseModel):
     sku: str
     name: str
@@ -71,3 +174,16 @@ class ProductCreate(BaseModel):
 class PriceUpdate(BaseModel):
     sku: str
     unit_price: float
+
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkUploadResult(BaseModel):
+    received: int
+    applied: int
+    rejected: int
+    # Detailed for the first rejected rows only
+    errors: List[BulkRowError] = []
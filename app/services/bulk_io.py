@@ -0,0 +1,185 @@
+"""
+Line-oriented parsing of bulk uploads (CSV with a header row, or JSONL).
+
+Bodies are consumed line by line, so a 40k-row upload is never held in
+memory as a whole. Every row is validated against a pydantic model; bad rows
+are reported with their row number instead of failing the whole upload.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Generic, Iterable, Iterator, List, Literal, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+BulkFormat = Literal["csv", "jsonl"]
+
+# Rows kept per batch before they are written to the DB
+BATCH_SIZE = 1000
+# Rejected rows reported back in detail; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+# Lines a quoted CSV field may span before its record is taken for a stray quote
+MAX_RECORD_LINES = 100
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+# (row number in the upload, validated record)
+Batch = List[Tuple[int, ModelT]]
+
+
+def detect_format(content_type: str | None, explicit: BulkFormat | None = None) -> BulkFormat:
+    if explicit:
+        return explicit
+    if content_type and "csv" in content_type.lower():
+        return "csv"
+    return "jsonl"
+
+
+@dataclass
+class RowError:
+    row: int
+    error: str
+
+
+@dataclass
+class BulkReport:
+    received: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    errors: List[RowError] = field(default_factory=list)
+
+    def reject(self, row: int, error: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(row=row, error=error))
+
+
+class RecordParser(Generic[ModelT]):
+    """
+    Turns text lines into validated `model` instances. For CSV the first
+    non-empty record is the header; a quoted field may span up to
+    MAX_RECORD_LINES lines (the record is complete once its quotes are
+    balanced). Rejected rows are recorded on `report` with the line number
+    the record starts on.
+    """
+
+    def __init__(self, model: Type[ModelT], fmt: BulkFormat) -> None:
+        self.model = model
+        self.fmt = fmt
+        self.report = BulkReport()
+        self._header: List[str] | None = None
+        self._line_no = 0
+        # CSV lines of a record whose quoted field is not closed yet, the line
+        # it starts on and its running quote count
+        self._pending: List[str] = []
+        self._pending_start = 0
+        self._pending_quotes = 0
+
+    def feed(self, line: str) -> Batch:
+        """
+        The (row number, record) pairs `line` completes: usually none or one,
+        more when an unterminated record is rejected and its lines re-read.
+        """
+        self._line_no += 1
+        if self.fmt == "csv":
+            return self._feed_csv(self._line_no, line.rstrip("\r\n"))
+        line = line.strip()
+        if not line:
+            return []
+        return self._accept(self._line_no, line)
+
+    def close(self) -> Batch:
+        """Call at the end of the input: rejects records left open by an unbalanced quote."""
+        records: Batch = []
+        while self._pending:
+            records += self._reject_pending()
+        return records
+
+    def _feed_csv(self, line_no: int, line: str) -> Batch:
+        if not self._pending:
+            if not line.strip():
+                return []
+            self._pending_start = line_no
+            self._pending_quotes = 0
+        self._pending.append(line)
+        self._pending_quotes += line.count('"')
+        if self._pending_quotes % 2 == 0:
+            text = "\n".join(self._pending)
+            self._pending = []
+            return self._accept(self._pending_start, next(csv.reader(text.splitlines(keepends=True))))
+        if len(self._pending) >= MAX_RECORD_LINES:
+            return self._reject_pending()
+        return []
+
+    def _reject_pending(self) -> Batch:
+        # Most likely a stray quote: reject the line it is on and re-read the rest
+        start, lines = self._pending_start, self._pending
+        self._pending = []
+        self.report.received += 1
+        self.report.reject(start, "unterminated quoted field")
+        records: Batch = []
+        for line_no, line in enumerate(lines[1:], start=start + 1):
+            records += self._feed_csv(line_no, line)
+        return records
+
+    def _accept(self, row_no: int, raw: str | List[str]) -> Batch:
+        if self.fmt == "csv" and self._header is None:
+            self._header = [name.strip() for name in raw]
+            return []
+
+        self.report.received += 1
+        try:
+            if self.fmt == "csv":
+                if len(raw) != len(self._header):
+                    raise ValueError(f"expected {len(self._header)} columns, got {len(raw)}")
+                data = dict(zip(self._header, raw))
+            else:
+                data = json.loads(raw)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+            record = self.model.model_validate(data)
+        except ValidationError as exc:
+            self.report.reject(row_no, "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in exc.errors()
+            ))
+            return []
+        except ValueError as exc:  # includes json.JSONDecodeError and csv.Error
+            self.report.reject(row_no, str(exc))
+            return []
+
+        self.report.accepted += 1
+        return [(row_no, record)]
+
+    def batches(self, lines: Iterable[str], size: int = BATCH_SIZE) -> Iterator[Batch]:
+        batch: Batch = []
+        for line in lines:
+            batch += self.feed(line)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        batch += self.close()
+        if batch:
+            yield batch
+
+    async def abatches(self, chunks: AsyncIterator[bytes], size: int = BATCH_SIZE) -> AsyncIterator[Batch]:
+        """Like `batches`, over a streamed request body."""
+        batch: Batch = []
+        async for line in iter_lines(chunks):
+            batch += self.feed(line)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        batch += self.close()
+        if batch:
+            yield batch
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decoded lines of a byte stream whose chunks may split lines (or UTF-8 characters)."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig")
+    if pending:
+        yield pending.decode("utf-8-sig")
@@ -0,0 +1,193 @@
+"""
+Background execution of `/pipeline/jobs`, without an external broker.
+
+Jobs are rows of `pipeline_jobs`. A bounded thread pool of the API process
+runs them, each with its own DB session, and writes the stage, result or
+error back to the row, so the status can be read from any process.
+
+Cancellation is cooperative: a queued job is cancelled at once, a running
+one stops at its next pipeline checkpoint (MainAgent.run_full_pipeline's
+`progress`). Jobs still queued when the process stopped are resubmitted by
+`recover()` on startup; jobs that were running are marked failed.
+"""
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db import models, repositories
+from app.db.session import SessionFactory
+from app.domain.agents.main_agent import MainAgent
+from app.models.schemas import PipelineJobRequest
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised at a pipeline checkpoint once the job's cancellation was requested."""
+
+
+class QueueFull(Exception):
+    """Too many jobs queued or running in this process."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobRunner:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_workers: int,
+        max_pending: int,
+        agent: MainAgent | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline-job")
+        self._max_pending = max_pending
+        self._agent = agent or MainAgent()
+        self._lock = threading.Lock()
+        # Jobs submitted to the pool and not finished yet
+        self._pending = 0
+
+    def submit(self, db: Session, request: PipelineJobRequest) -> models.PipelineJob:
+        """Persists a queued job and hands it to the pool. Raises QueueFull."""
+        with self._lock:
+            if self._pending >= self._max_pending:
+                raise QueueFull(f"{self._pending} pipeline jobs already pending")
+            self._pending += 1
+        try:
+            job = repositories.create_pipeline_job(db, uuid.uuid4().hex, request.model_dump(mode="json"))
+            db.commit()
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        self._executor.submit(self._run, job.id)
+        return job
+
+    def cancel(self, db: Session, job_id: str) -> bool:
+        """False when the job already finished. Does not wait for a running job to stop."""
+        cancelled = repositories.transition_pipeline_job(
+            db, job_id, ["queued"], status="cancelled", cancel_requested=True, finished_at=_now()
+        ) or repositories.transition_pipeline_job(db, job_id, ["running"], cancel_requested=True)
+        db.commit()
+        return cancelled
+
+    def recover(self) -> None:
+        """On startup: resubmits queued jobs, fails those interrupted while running."""
+        with self._session_factory() as db:
+            for job_id in repositories.get_pipeline_job_ids(db, ["running"]):
+                repositories.transition_pipeline_job(
+                    db, job_id, ["running"], status="failed", error="Interrupted by a restart", finished_at=_now()
+                )
+            queued = repositories.get_pipeline_job_ids(db, ["queued"])
+            db.commit()
+        for job_id in queued:
+            with self._lock:
+                self._pending += 1
+            self._executor.submit(self._run, job_id)
+
+    def shutdown(self) -> None:
+        # Queued jobs stay queued in the DB and are picked up by recover()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id: str) -> None:
+        try:
+            self._execute(job_id)
+        except Exception as e:
+            # Nothing observes the pool's future: log, and fail the job so it is not left queued
+            logger.exception(f"Pipeline job {job_id} could not be run")
+            self._fail_unfinished(job_id, f"Could not be run: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _execute(self, job_id: str) -> None:
+        with self._session_factory() as db:
+            # Lost to a cancellation (or another process): nothing to do
+            if not repositories.transition_pipeline_job(db, job_id, ["queued"], status="running", started_at=_now()):
+                db.rollback()
+                return
+            db.commit()
+
+            try:
+                params = PipelineJobRequest.model_validate(repositories.get_pipeline_job(db, job_id).params)
+                response = self._agent.run_full_pipeline(
+                    db,
+                    params.urls,
+                    live_mode=params.live_mode,
+                    top_k=params.top_k,
+                    test_allocation=params.test_allocation,
+                    as_of=params.as_of,
+                    progress=lambda stage: self._checkpoint(job_id, stage),
+                )
+            except JobCancelled:
+                db.rollback()
+                self._finish(job_id, "cancelled")
+            except HTTPException as e:
+                db.rollback()
+                self._finish(job_id, "failed", error=str(e.detail))
+            except Exception as e:
+                logger.exception(f"Pipeline job {job_id} failed")
+                db.rollback()
+                self._finish(job_id, "failed", error=str(e))
+            else:
+                self._finish(job_id, "succeeded", result=response.model_dump(mode="json"))
+
+    def _fail_unfinished(self, job_id: str, error: str) -> None:
+        try:
+            with self._session_factory() as db:
+                repositories.transition_pipeline_job(
+                    db, job_id, ["queued", "running"], status="failed", error=error, finished_at=_now()
+                )
+                db.commit()
+        except Exception:
+            # DB still unavailable: recover() resubmits (queued) or fails (running) it on the next start
+            logger.exception(f"Pipeline job {job_id} could not be marked failed")
+
+    def _checkpoint(self, job_id: str, stage: str) -> None:
+        # Own session: the pipeline's session may be mid-transaction
+        with self._session_factory() as db:
+            job = repositories.get_pipeline_job(db, job_id)
+            if job is None or job.cancel_requested:
+                raise JobCancelled(job_id)
+            repositories.transition_pipeline_job(db, job_id, ["running"], stage=stage)
+            db.commit()
+
+    def _finish(self, job_id: str, status: str, **values) -> None:
+        with self._session_factory() as db:
+            repositories.transition_pipeline_job(db, job_id, ["running"], status=status, finished_at=_now(), **values)
+            db.commit()
+
+
+_runner: JobRunner | None = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            settings = get_settings()
+            _runner = JobRunner(
+                SessionFactory,
+                max_workers=settings.pipeline_job_workers,
+                max_pending=settings.pipeline_job_max_pending,
+            )
+        return _runner
+
+
+def shutdown_job_runner() -> None:
+    global _runner
+    with _runner_lock:
+        runner, _runner = _runner, None
+    if runner is not None:
+        runner.shutdown()
@@ -0,0 +1,55 @@
+"""
+Bulk product import shared by `POST /inventory/products/bulk` and the
+`python -m app.import_products` CLI.
+
+Rows arrive in validated batches (see bulk_io.RecordParser). Each batch is
+checked for SKUs that already exist (in the DB or earlier in the upload) and
+inserted with one executemany. The caller calls `refresh_scores` and commits
+once at the end, then calls `finish`, so RFP scores and catalog caches are
+rebuilt once, not per row.
+"""
+from typing import Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db import repositories
+from app.domain.catalog import invalidate_catalog
+from app.domain.rfp_scoring import refresh_scores_for_specs
+from app.models.schemas import ProductCreate
+from app.services.bulk_io import Batch, BulkReport
+
+
+class ProductImport:
+    def __init__(self, report: BulkReport) -> None:
+        self.report = report
+        self.imported = 0
+        # SKUs of this upload so far; only strings are kept across batches
+        self._seen: Set[str] = set()
+        # (conductor, insulation) of the imported products
+        self._specs: Set[Tuple[str, str]] = set()
+
+    def import_batch(self, db: Session, batch: Batch[ProductCreate]) -> int:
+        existing = repositories.get_existing_skus(db, [product.sku for _, product in batch])
+        rows = []
+        for row_no, product in batch:
+            if product.sku in self._seen:
+                self.report.reject(row_no, f"SKU {product.sku} is repeated in the upload")
+            elif product.sku in existing:
+                self.report.reject(row_no, f"SKU {product.sku} already exists")
+            else:
+                self._seen.add(product.sku)
+                self._specs.add((product.conductor, product.insulation))
+                rows.append(product.model_dump())
+
+        inserted = repositories.bulk_create_products(db, rows)
+        self.imported += inserted
+        return inserted
+
+    def refresh_scores(self, db: Session) -> None:
+        """Call before the commit: rescores the RFPs the new products can match."""
+        refresh_scores_for_specs(db, self._specs)
+
+    def finish(self) -> None:
+        """Call after the commit: one catalog rebuild for the whole import."""
+        if self.imported:
+            invalidate_catalog()
@@ -1,6 +1,7 @@
 import logging
 import time
 import os
+import tempfile
 import requests
 from typing import List, Dict, Optional
 from selenium.webdriver.common.by import By
@@ -29,16 +30,16 @@ class ScraperService:
 
     def download_file(self, url: str) -> Optional[str]:
         """
-        Downloads a file from a URL and returns the local path.
+        Downloads a file from a URL to a new file in `download_dir` and
+        returns its path; the caller deletes it when done.
         """
+        path = None
         try:
-            local_filename = url.split('/')[-1]
-            # Sanitize filename if needed
-            if not local_filename.lower().endswith('.pdf'):
-                local_filename += ".pdf"
-                
-            path = os.path.join(self.download_dir, local_filename)
-            
+            # Unique per download: concurrent downloads may share a basename
+            stem = os.path.splitext(url.split('/')[-1])[0]
+            fd, path = tempfile.mkstemp(prefix=f"{stem}-", suffix=".pdf", dir=self.download_dir)
+            os.close(fd)
+
             # Simple requests download (for direct links)
             # For authorized downloads, cookies would need to be passed from Selenium
             response = requests.get(url, stream=True, timeout=15)
@@ -51,6 +52,8 @@ class ScraperService:
             return path
         except Exception as e:
             logger.error(f"Failed to download {url}: {e}")
+            if path and os.path.exists(path):
+                os.remove(path)
             return None
 
 class GenericPSUScraper(ScraperService):
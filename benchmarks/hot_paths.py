@@ -0,0 +1,197 @@
+"""
+Benchmarks for the matching and pricing hot paths.
+
+Self-contained: every run builds a throwaway SQLite database with a synthetic
+catalog and synthetic RFPs, so no Postgres (or seeded data) is needed.
+
+    python -m benchmarks.hot_paths
+    python -m benchmarks.hot_paths --skus 1000 10000 100000 --lines 10 100 1000 --output bench.json
+
+Reports, per (catalog size, RFP size) and stage, the p50/p95 latency in ms
+and the line-item throughput as JSON, so runs can be diffed across commits.
+Stages:
+- compute_spec_match: the scalar reference metric, every line against every SKU
+- process_rfp:        TechnicalAgent.process_rfp (catalog snapshot warm, match cache off)
+- price_rfp:          PricingAgent.price_rfp on the resulting technical table
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import get_settings
+from app.db import models, price_book
+from app.domain import catalog
+from app.domain.agents import technical_agent
+from app.domain.agents.pricing_agent import PricingAgent
+from app.domain.agents.technical_agent import TechnicalAgent
+from app.domain.spec_matching import compute_spec_match
+
+CONDUCTORS = ["copper", "aluminium"]
+INSULATIONS = ["xlpe", "pvc", "epr", "lszh"]
+VOLTAGES = [0.65, 1.1, 3.3, 6.6, 11.0, 22.0, 33.0]
+CORES = [1, 2, 3, 3.5, 4, 5, 7, 12]
+SIZES = [1.5, 2.5, 4, 6, 10, 16, 25, 35, 50, 70, 95, 120, 150, 185, 240, 300, 400]
+TEST_CODES = ["HV_TEST", "IR_TEST", "CR_TEST", "FLAME_TEST", "TYPE_TEST"]
+
+# The scalar reference is O(lines x SKUs) in Python; skip it beyond this
+SCALAR_PAIR_LIMIT = 2_000_000
+
+
+def _spec(rng: random.Random) -> dict:
+    return {
+        "conductor": rng.choice(CONDUCTORS),
+        "insulation": rng.choice(INSULATIONS),
+        "voltage_kv": rng.choice(VOLTAGES),
+        "cores": rng.choice(CORES),
+        "size_sqmm": rng.choice(SIZES),
+        "armoured": rng.random() < 0.5,
+    }
+
+
+def seed_catalog(db: Session, n_skus: int, rng: random.Random) -> None:
+    products, prices = [], []
+    for i in range(n_skus):
+        sku = f"BENCH-{i:06d}"
+        products.append(
+            {"sku": sku, "name": f"Cable {i}", "category": "Power", "application": "bench", **_spec(rng)}
+        )
+        prices.append({"sku": sku, "unit_price": round(rng.uniform(50, 5000), 2)})
+    db.execute(insert(models.Product), products)
+    db.execute(insert(models.SkuPrice), prices)
+    db.execute(
+        insert(models.TestPrice),
+        [{"test_code": code, "price": rng.uniform(1000, 20000)} for code in TEST_CODES],
+    )
+    db.commit()
+
+
+def seed_rfp(db: Session, n_lines: int, rng: random.Random) -> models.RFP:
+    rfp = models.RFP(
+        external_id=f"BENCH-RFP-{n_lines}",
+        title=f"Synthetic RFP with {n_lines} lines",
+        source_url="http://bench.local",
+        due_date=date.today() + timedelta(days=30),
+    )
+    rfp.line_items = [
+        models.RFPLineItem(
+            line_no=i + 1, description=f"Line {i + 1}", quantity_m=rng.choice([100, 500, 1000, 5000]), **_spec(rng)
+        )
+        for i in range(n_lines)
+    ]
+    rfp.tests = [models.RFPTest(test_code=code) for code in rng.sample(TEST_CODES, 3)]
+    db.add(rfp)
+    db.commit()
+    return rfp
+
+
+def measure(fn: Callable[[], object], repeat: int, items: int) -> dict:
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    p95_index = min(len(timings) - 1, round(0.95 * (len(timings) - 1)))
+    return {
+        "repeat": repeat,
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[p95_index] * 1000, 3),
+        "lines_per_s": round(items / statistics.median(timings), 1) if timings[0] > 0 else None,
+    }
+
+
+def bench_catalog(n_skus: int, line_counts: List[int], repeat: int, seed: int) -> List[dict]:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            seed_catalog(db, n_skus, rng)
+            # Both caches are process-wide: drop what the previous catalog size loaded
+            catalog.invalidate_catalog()
+            price_book.invalidate_price_book()
+            start = time.perf_counter()
+            snapshot = catalog.get_catalog_snapshot(db)
+            build_ms = round((time.perf_counter() - start) * 1000, 3)
+
+            results = []
+            for n_lines in line_counts:
+                rfp = seed_rfp(db, n_lines, rng)
+                tech, pricing = TechnicalAgent(), PricingAgent()
+                stages: Dict[str, dict | None] = {}
+
+                required = [tech._required_specs(li) for li in rfp.line_items]
+                if n_lines * n_skus <= SCALAR_PAIR_LIMIT:
+                    stages["compute_spec_match"] = measure(
+                        lambda: [[compute_spec_match(r, p["specs"]) for p in snapshot.products] for r in required],
+                        repeat,
+                        n_lines,
+                    )
+                else:
+                    stages["compute_spec_match"] = None
+
+                stages["process_rfp"] = measure(lambda: tech.process_rfp(db, rfp), repeat, n_lines)
+                table = tech.process_rfp(db, rfp)
+                stages["price_rfp"] = measure(lambda: pricing.price_rfp(db, table, rfp.tests), repeat, n_lines)
+
+                results.append(
+                    {"skus": n_skus, "lines": n_lines, "catalog_build_ms": build_ms, "stages": stages}
+                )
+            return results
+        finally:
+            db.close()
+            engine.dispose()
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: List[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--lines", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage (after one warm-up)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Measure matching itself, not memoized repeats of the same RFP
+    technical_agent.match_cache.maxsize = 0
+    technical_agent.match_cache.clear()
+
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "spec_matcher": get_settings().spec_matcher,
+        "results": [row for n_skus in args.skus for row in bench_catalog(n_skus, args.lines, args.repeat, args.seed)],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+
+from app.db import models
+from app.db.price_book import invalidate_price_book
+from app.db.session import get_db
+from app.domain.agents import sales_agent
+from app.domain.agents.main_agent import MainAgent
+from app.domain.catalog import invalidate_catalog
+from app.services import scraper_service
+
+SOURCE = "http://async.test"
+
+
+class FakeScraper:
+    def __init__(self):
+        self.threads = set()
+
+    def scrape_listings(self, url):
+        self.threads.add(threading.current_thread().name)
+        return [{"title": f"A-LIVE-{n}", "doc_url": None} for n in range(3)]
+
+
+def _parsed_rfp(n: int) -> str:
+    return json.dumps({
+        "due_date": (date.today() + timedelta(days=20 + n)).isoformat(),
+        "line_items": [{
+            "line_no": 1, "description": f"live {n}", "quantity_m": 100, "conductor": "copper",
+            "insulation": "XLPE", "voltage_kv": 1.1, "cores": 4, "size_sqmm": 16, "armoured": True,
+        }],
+        "tests": ["A-HV"],
+    })
+
+
+def test_live_async_pipeline_ingests_listings_concurrently(db, monkeypatch):
+    in_flight = 0
+    peak = 0
+
+    async def fake_generate_text_async(prompt: str) -> str:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        n = int(prompt.split("A-LIVE-")[1][0])
+        return "```json" + _parsed_rfp(n) + "```"
+
+    monkeypatch.setattr(sales_agent, "generate_text_async", fake_generate_text_async)
+    try:
+        db.add(models.Product(
+            sku="A-CU-16", name="Cu 16", category="Power", conductor="copper", insulation="XLPE",
+            voltage_kv=1.1, cores=4, size_sqmm=16, application="feeder", armoured=True,
+        ))
+        db.add(models.SkuPrice(sku="A-CU-16", unit_price=10.0))
+        db.commit()
+        invalidate_catalog()
+        invalidate_price_book()
+
+        agent = MainAgent()
+        scraper = agent.sales.scraper = FakeScraper()
+        stages = []
+        response = asyncio.run(agent.run_full_pipeline_async(db, [SOURCE], live_mode=True, progress=stages.append))
+
+        # Selenium work ran on the browser executor, LLM calls overlapped
+        assert all(name.startswith("browser-executor") for name in scraper.threads)
+        assert peak == 3
+        assert stages == ["scanning", "matching", "pricing"]
+        assert db.query(models.RFP).filter(models.RFP.source_url == SOURCE).count() == 3
+
+        # Furthest due date ranks first; same result as the sync pipeline
+        assert response.rfp_summary.id == "A-LIVE-2"
+        assert response.technical_table[0].selected_sku.sku == "A-CU-16"
+        assert response.pricing_table.total_material_cost == 1000.0
+        assert agent.run_full_pipeline(db, [SOURCE]).model_dump() == response.model_dump()
+    finally:
+        invalidate_catalog()
+        invalidate_price_book()
+
+
+def test_get_db_gives_every_request_its_own_session():
+    # Same thread, overlapping requests (an async endpoint still awaiting)
+    first, second = get_db(), get_db()
+    try:
+        assert next(first) is not next(second)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_concurrent_downloads_do_not_share_a_file(tmp_path, monkeypatch):
+    class FakeResponse:
+        def __init__(self, body):
+            self.body = body
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, chunk_size):
+            yield self.body
+
+    bodies = iter([b"first", b"second"])
+    monkeypatch.setattr(scraper_service.requests, "get", lambda url, **kwargs: FakeResponse(next(bodies)))
+    scraper = scraper_service.ScraperService(download_dir=str(tmp_path))
+
+    # Same basename on two portals
+    first = scraper.download_file("http://a.test/docs/tender.pdf")
+    second = scraper.download_file("http://b.test/docs/tender.pdf")
+    assert first != second
+    assert open(first, "rb").read() == b"first" and open(second, "rb").read() == b"second"
+
+
+def test_downloaded_documents_are_deleted_after_parsing(db, tmp_path, monkeypatch):
+    class DownloadingScraper(scraper_service.ScraperService):
+        def scrape_listings(self, url):
+            return [{"title": f"A-DOC-{n}", "doc_url": f"http://docs.test/{n}.pdf"} for n in range(2)]
+
+        def download_file(self, url):
+            fd, path = tempfile.mkstemp(suffix=".pdf", dir=self.download_dir)
+            os.close(fd)
+            return path
+
+    parsed = []
+    monkeypatch.setattr(sales_agent.PDFParser, "extract_text", lambda path: parsed.append(path) or "")
+    monkeypatch.setattr(sales_agent.SalesAgent, "_llm_parse_rfp", lambda self, title, text: None)
+
+    async def no_rfp(self, title, text):
+        return None
+
+    monkeypatch.setattr(sales_agent.SalesAgent, "_llm_parse_rfp_async", no_rfp)
+    agent = sales_agent.SalesAgent()
+    agent.scraper = DownloadingScraper(download_dir=str(tmp_path))
+
+    agent._scrape_and_ingest(db, [SOURCE])
+    asyncio.run(agent._scrape_and_ingest_async(db, [SOURCE]))
+    assert len(parsed) == 4
+    assert os.listdir(tmp_path) == []
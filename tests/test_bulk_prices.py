@@ -0,0 +1,58 @@
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db import models, price_book
+from app.models.schemas import PriceUpdate
+from app.services.bulk_io import MAX_RECORD_LINES, RecordParser
+
+settings = get_settings()
+
+
+def _prices(db) -> dict:
+    return dict(db.execute(select(models.SkuPrice.sku, models.SkuPrice.unit_price)).all())
+
+
+def test_bulk_price_upload_csv_and_jsonl(client, db):
+    url = f"{settings.api_v1_prefix}/inventory/prices/bulk"
+    try:
+        db.add(models.SkuPrice(sku="BULK-1", unit_price=1.0))
+        db.commit()
+        price_book.invalidate_price_book()
+        price_book.get_price_book(db)
+
+        # 2 500 rows: several batches, chunks that split lines, one bad row, one repeated SKU
+        lines = ["sku,unit_price"] + [f"BULK-{i},{i}.5" for i in range(1, 2501)] + ["BULK-BAD,cheap", "BULK-7,70"]
+        body = ("\n".join(lines) + "\n").encode()
+        chunks = (body[i:i + 4096] for i in range(0, len(body), 4096))
+        response = client.post(url, content=chunks, headers={"Content-Type": "text/csv"})
+        assert response.status_code == 200
+        result = response.json()
+        assert (result["received"], result["applied"], result["rejected"]) == (2502, 2501, 1)
+        assert result["errors"][0]["row"] == 2502
+        assert "unit_price" in result["errors"][0]["error"]
+
+        prices = _prices(db)
+        assert len(prices) == 2500
+        assert prices["BULK-1"] == 1.5 and prices["BULK-7"] == 70.0
+        assert price_book.get_price_book(db).sku_prices["BULK-2500"] == 2500.5
+
+        jsonl = b'{"sku": "BULK-1", "unit_price": 9}\n\nnot json\n{"sku": "BULK-NEW", "unit_price": 3}'
+        response = client.post(url, content=jsonl, params={"format": "jsonl"})
+        result = response.json()
+        assert (result["received"], result["applied"], result["rejected"]) == (3, 2, 1)
+        assert result["errors"][0]["row"] == 3
+        prices = _prices(db)
+        assert prices["BULK-1"] == 9.0 and prices["BULK-NEW"] == 3.0
+    finally:
+        price_book.invalidate_price_book()
+
+
+def test_stray_quote_rejects_only_its_row():
+    parser = RecordParser(PriceUpdate, "csv")
+    lines = ["sku,unit_price", "Q-1,1", 'Q-"2,2'] + [f"Q-{i},{i}" for i in range(3, 3 + 5 * MAX_RECORD_LINES)]
+    records = [record for batch in parser.batches(lines, size=50) for record in batch]
+
+    assert [(err.row, err.error) for err in parser.report.errors] == [(3, "unterminated quoted field")]
+    assert len(records) == parser.report.accepted == 1 + 5 * MAX_RECORD_LINES
+    # Re-read lines keep their own row numbers and order
+    assert [row for row, _ in records] == [2] + list(range(4, 4 + 5 * MAX_RECORD_LINES))
@@ -0,0 +1,93 @@
+import csv
+import json
+
+from sqlalchemy import event, select
+
+import app.import_products as import_cli
+from app.core.config import get_settings
+from app.db import models
+from app.domain import catalog
+
+settings = get_settings()
+
+
+def _product(sku: str, **overrides) -> dict:
+    return {
+        "sku": sku, "name": sku, "category": "Power", "conductor": "copper", "insulation": "XLPE",
+        "voltage_kv": 1.1, "cores": 4, "size_sqmm": 16, "application": "feeder", "armoured": True, **overrides,
+    }
+
+
+def test_bulk_product_import_endpoint(client, db_engine, db):
+    url = f"{settings.api_v1_prefix}/inventory/products/bulk"
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    try:
+        db.add(models.Product(**_product("IMP-EXISTING")))
+        db.commit()
+        version = catalog.catalog_version()
+
+        rows = [_product(f"IMP-{i}", unit_price=10.0 * i) for i in range(1, 1201)]
+        rows += [_product("IMP-EXISTING"), _product("IMP-5"), {"sku": "IMP-BAD"}]
+        body = "\n".join(json.dumps(row) for row in rows).encode()
+
+        event.listen(db_engine, "before_cursor_execute", listener)
+        response = client.post(url, content=body)
+        event.remove(db_engine, "before_cursor_execute", listener)
+
+        assert response.status_code == 200
+        result = response.json()
+        assert (result["received"], result["applied"], result["rejected"]) == (1203, 1200, 3)
+        assert [err["row"] for err in result["errors"]] == [1201, 1202, 1203]
+        assert "already exists" in result["errors"][0]["error"]
+        assert "repeated" in result["errors"][1]["error"]
+        # Batched: 2 batches x (product insert, history backfill, price upsert, price history insert),
+        # not one per row
+        inserts = [s for s in statements if s.lstrip().upper().startswith("INSERT")]
+        assert len(inserts) == 8
+
+        assert db.scalar(select(models.SkuPrice.unit_price).where(models.SkuPrice.sku == "IMP-1200")) == 12000.0
+        assert len(db.scalars(select(models.Product.sku)).all()) == 1201
+        # One catalog rebuild for the whole import
+        assert catalog.catalog_version() == version + 1
+    finally:
+        catalog.invalidate_catalog()
+
+
+def test_import_products_cli(tmp_path, monkeypatch, capsys, session_factory, db):
+    monkeypatch.setattr(import_cli, "SessionLocal", session_factory)
+    path = tmp_path / "products.csv"
+    header = list(_product("x")) + ["unit_price"]
+    lines = [",".join(header)]
+    lines += [",".join(str(v) for v in _product(f"CLI-{i}", unit_price=5).values()) for i in range(3)]
+    lines.append("CLI-BAD,only,three")
+    path.write_text("\n".join(lines) + "\n")
+
+    assert import_cli.main([str(path), "--batch-size", "2"]) == 1
+    assert "Imported 3 of 4 rows, rejected 1." in capsys.readouterr().out
+
+    assert set(db.scalars(select(models.Product.sku).where(models.Product.sku.like("CLI-%")))) == {
+        "CLI-0", "CLI-1", "CLI-2"
+    }
+    catalog.invalidate_catalog()
+
+
+def test_csv_fields_may_span_lines(tmp_path, monkeypatch, capsys, session_factory, db):
+    monkeypatch.setattr(import_cli, "SessionLocal", session_factory)
+    path = tmp_path / "products.csv"
+    with path.open("w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(_product("x"))
+        writer.writerow(_product("ML-1", name="Armoured,\n4 core").values())
+        writer.writerow(_product("ML-2").values())
+        fh.write('ML-3,"never closed\n')
+
+    assert import_cli.main([str(path)]) == 1
+    captured = capsys.readouterr()
+    assert "Imported 2 of 3 rows, rejected 1." in captured.out
+    # Row numbers are the line a record starts on
+    assert "row 5: unterminated quoted field" in captured.err
+
+    rows = db.execute(select(models.Product.sku, models.Product.name).where(models.Product.sku.like("ML-%")))
+    assert dict(rows.all()) == {"ML-1": "Armoured,\n4 core", "ML-2": "ML-2"}
+    catalog.invalidate_catalog()
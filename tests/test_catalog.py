@@ -0,0 +1,63 @@
+from sqlalchemy import event
+
+from app.core.config import get_settings
+from app.db import models
+from app.domain import catalog
+
+
+def _product(sku: str, conductor: str) -> models.Product:
+    return models.Product(
+        sku=sku, name=sku, category="Power", conductor=conductor, insulation="XLPE",
+        voltage_kv=1.1, cores=4, size_sqmm=16, application="feeder", armoured=True,
+    )
+
+
+def test_snapshot_is_reused_until_invalidated(db_engine, db):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db_engine, "before_cursor_execute", listener)
+    try:
+        db.add(_product("CAT-1", "Copper"))
+        db.commit()
+        catalog.invalidate_catalog()
+
+        first = catalog.get_catalog_snapshot(db)
+        statements.clear()
+        assert catalog.get_catalog_snapshot(db) is first
+        assert statements == []
+        assert first.inventory_specs == {("copper", "xlpe")}
+
+        db.add(_product("CAT-2", "Aluminium"))
+        db.commit()
+        version = catalog.invalidate_catalog()
+
+        second = catalog.get_catalog_snapshot(db)
+        assert second.version == version
+        assert [p["sku"] for p in second.products] == ["CAT-1", "CAT-2"]
+        assert second.engine.size == 2
+    finally:
+        event.remove(db_engine, "before_cursor_execute", listener)
+        catalog.invalidate_catalog()
+
+
+def test_add_to_catalog_skips_products_already_in_a_rebuilt_snapshot(db, monkeypatch):
+    monkeypatch.setattr(get_settings(), "spec_matcher", "ann")
+    try:
+        db.add(_product("ADD-A", "Copper"))
+        db.commit()
+        catalog.invalidate_catalog()
+        catalog.get_catalog_snapshot(db)
+
+        # Stale (e.g. a price update), then rebuilt by a reader after the product commit
+        catalog.invalidate_catalog()
+        new = _product("ADD-B", "Aluminium")
+        db.add(new)
+        db.commit()
+        catalog.get_catalog_snapshot(db)
+        catalog.add_to_catalog([new])
+
+        snapshot = catalog.get_catalog_snapshot(db)
+        assert sorted(p["sku"] for p in snapshot.products if p["sku"].startswith("ADD-")) == ["ADD-A", "ADD-B"]
+        assert snapshot.engine.size == len(snapshot.products)
+    finally:
+        catalog.invalidate_catalog()
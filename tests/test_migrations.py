@@ -0,0 +1,48 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.db import migrations, models
+
+
+def _legacy_engine(tmp_path):
+    """A database as create_all built it before the hot-path indexes existed."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in ("ix_rfp_line_items_rfp_id", "ix_rfp_tests_rfp_id", "ix_rfps_source_url_due_date", "ix_sku_prices_sku"):
+            conn.execute(text(f"DROP INDEX {name}"))
+        conn.execute(text("CREATE INDEX ix_sku_prices_sku ON sku_prices (sku)"))
+        # Price history did not exist yet either
+        conn.execute(text("DROP TABLE sku_price_history"))
+        conn.execute(text(
+            "INSERT INTO sku_prices (id, sku, unit_price) VALUES (1, 'A', 1.0), (2, 'A', 2.0), (3, 'B', 3.0)"
+        ))
+    return engine
+
+
+def test_migrate_adds_indexes_to_existing_database(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    assert set(migrations.check_indexes(engine)) == {
+        "line items of an RFP", "tests of an RFP", "RFPs due by source", "price history of a SKU",
+    }
+
+    assert migrations.migrate(engine) == [1, 2, 3, 4, 5]
+    assert migrations.migrate(engine) == []
+    assert migrations.applied_versions(engine) == [1, 2, 3, 4, 5]
+
+    indexes = {ix["name"]: ix for ix in inspect(engine).get_indexes("sku_prices")}
+    assert indexes["ix_sku_prices_sku"]["unique"]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id, sku FROM sku_prices ORDER BY id")).all() == [(1, "A"), (3, "B")]
+        # Prices held before history was kept are recorded as effective since the epoch
+        assert conn.execute(text(
+            "SELECT sku, unit_price, effective_from FROM sku_price_history ORDER BY sku"
+        )).all() == [("A", 1.0, "1970-01-01"), ("B", 3.0, "1970-01-01")]
+    assert migrations.check_indexes(engine) == {}
+
+
+def test_fresh_database_only_records_migrations(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    assert migrations.check_indexes(engine) == {}
+    assert migrations.migrate(engine) == [1, 2, 3, 4, 5]
+    assert migrations.check_indexes(engine) == {}
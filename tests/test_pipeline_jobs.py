@@ -0,0 +1,153 @@
+import threading
+import time
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import get_db
+from app.core.config import get_settings
+from app.db import models, repositories
+from app.db.price_book import invalidate_price_book
+from app.domain.agents.main_agent import MainAgent
+from app.domain.catalog import invalidate_catalog
+from app.main import app
+from app.services.job_runner import JobRunner, get_job_runner
+
+settings = get_settings()
+JOBS = f"{settings.api_v1_prefix}/pipeline/jobs"
+SOURCE = "http://jobs.test"
+
+
+class BlockingAgent(MainAgent):
+    """Stops between the scan and matching stages until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.scanned = threading.Event()
+        self.release = threading.Event()
+
+    def run_full_pipeline(self, db, urls, progress=None, **kwargs):
+        progress("scanning")
+        self.scanned.set()
+        self.release.wait(5)
+        progress("matching")
+        raise AssertionError("should have been cancelled")
+
+
+def _client(tmp_path, agent=None, max_pending=10):
+    # A file database: worker sessions use their own connections
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    runner = JobRunner(session_factory, max_workers=1, max_pending=max_pending, agent=agent)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_job_runner] = lambda: runner
+    return TestClient(app), session_factory, runner
+
+
+def _wait_for(client, job_id, statuses):
+    for _ in range(200):
+        job = client.get(f"{JOBS}/{job_id}").json()
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+def test_job_runs_pipeline_in_background(tmp_path):
+    client, session_factory, runner = _client(tmp_path)
+    try:
+        with session_factory() as db:
+            db.add(models.Product(
+                sku="J-CU-16", name="Cu 16", category="Power", conductor="copper", insulation="XLPE",
+                voltage_kv=1.1, cores=4, size_sqmm=16, application="feeder", armoured=True,
+            ))
+            db.add(models.SkuPrice(sku="J-CU-16", unit_price=10.0))
+            rfp = models.RFP(external_id="J-RFP", title="Jobs", source_url=SOURCE, due_date=date.today() + timedelta(days=20))
+            rfp.line_items = [models.RFPLineItem(
+                line_no=1, description="line", quantity_m=100, conductor="copper", insulation="XLPE",
+                voltage_kv=1.1, cores=4, size_sqmm=16, armoured=True,
+            )]
+            db.add(rfp)
+            db.commit()
+        invalidate_catalog()
+        invalidate_price_book()
+
+        response = client.post(JOBS, json={"urls": [SOURCE], "top_k": 2})
+        assert response.status_code == 202
+        assert response.json()["status"] == "queued"
+
+        job = _wait_for(client, response.json()["id"], {"succeeded", "failed"})
+        assert job["status"] == "succeeded", job["error"]
+        assert job["stage"] == "pricing"
+        assert job["result"]["rfp_summary"]["id"] == "J-RFP"
+        assert job["result"]["pricing_table"]["total_material_cost"] == 1000.0
+        assert job["started_at"] and job["finished_at"]
+
+        # No RFP from that source: the pipeline's 404 becomes the job error
+        failed = _wait_for(client, client.post(JOBS, json={"urls": ["http://none.test"]}).json()["id"], {"succeeded", "failed"})
+        assert (failed["status"], failed["error"]) == ("failed", "No RFPs found")
+        assert client.get(f"{JOBS}/missing").status_code == 404
+    finally:
+        runner.shutdown()
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_job_runner, None)
+        invalidate_catalog()
+        invalidate_price_book()
+
+
+def test_jobs_are_bounded_and_cancellable(tmp_path):
+    agent = BlockingAgent()
+    client, _, runner = _client(tmp_path, agent=agent, max_pending=2)
+    try:
+        running = client.post(JOBS, json={}).json()["id"]
+        queued = client.post(JOBS, json={}).json()["id"]
+        assert client.post(JOBS, json={}).status_code == 429
+        assert agent.scanned.wait(5)
+
+        # One worker: the second job waits and is cancelled before it starts
+        job = client.post(f"{JOBS}/{queued}/cancel").json()
+        assert job["status"] == "cancelled"
+
+        # The running job stops at its next checkpoint
+        assert client.post(f"{JOBS}/{running}/cancel").json()["cancel_requested"] is True
+        agent.release.set()
+        job = _wait_for(client, running, {"cancelled", "failed", "succeeded"})
+        assert (job["status"], job["stage"]) == ("cancelled", "scanning")
+        assert client.post(f"{JOBS}/{running}/cancel").status_code == 409
+    finally:
+        agent.release.set()
+        runner.shutdown()
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_job_runner, None)
+
+
+def test_job_that_cannot_start_is_failed_not_left_queued(tmp_path, monkeypatch):
+    client, _, runner = _client(tmp_path)
+    transition = repositories.transition_pipeline_job
+
+    def flaky_transition(db, job_id, from_statuses, **values):
+        if values.get("status") == "running":
+            raise OperationalError("UPDATE pipeline_jobs", {}, Exception("database is locked"))
+        return transition(db, job_id, from_statuses, **values)
+
+    monkeypatch.setattr(repositories, "transition_pipeline_job", flaky_transition)
+    try:
+        job = _wait_for(client, client.post(JOBS, json={}).json()["id"], {"failed", "succeeded"})
+        assert job["status"] == "failed"
+        assert "database is locked" in job["error"]
+    finally:
+        runner.shutdown()
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_job_runner, None)
@@ -0,0 +1,71 @@
+import threading
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.domain.agents.main_agent import MainAgent
+from app.db.price_book import invalidate_price_book
+from app.domain.catalog import invalidate_catalog
+
+SOURCE = "http://top-n.test"
+
+
+def _seed(db):
+    db.add(models.Product(
+        sku="N-CU-16", name="Cu 16", category="Power", conductor="copper", insulation="XLPE",
+        voltage_kv=1.1, cores=4, size_sqmm=16, application="feeder", armoured=True,
+    ))
+    db.add(models.SkuPrice(sku="N-CU-16", unit_price=10.0))
+    db.add(models.TestPrice(test_code="N-HV", price=100.0))
+    for n, days in enumerate([10, 16, 22, 28]):
+        rfp = models.RFP(external_id=f"N-RFP-{n}", title=f"RFP {n}", source_url=SOURCE, due_date=date.today() + timedelta(days=days))
+        rfp.line_items = [
+            models.RFPLineItem(
+                line_no=i, description=f"line {i}", quantity_m=100 * (n + 1), conductor="copper", insulation="XLPE",
+                voltage_kv=1.1, cores=4, size_sqmm=16, armoured=True,
+            )
+            for i in range(1, 3)
+        ]
+        rfp.tests = [models.RFPTest(test_code="N-HV")]
+        db.add(rfp)
+    db.commit()
+
+
+def test_top_n_pipeline_runs_concurrently_in_rank_order(tmp_path, monkeypatch):
+    # A file database: every worker session gets its own connection
+    engine = create_engine(f"sqlite:///{tmp_path / 'top_n.db'}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        _seed(db)
+        invalidate_catalog()
+        invalidate_price_book()
+        agent = MainAgent()
+
+        threads = set()
+        respond = agent._respond
+
+        def tracking_respond(*args, **kwargs):
+            threads.add(threading.current_thread().name)
+            return respond(*args, **kwargs)
+
+        monkeypatch.setattr(agent, "_respond", tracking_respond)
+        responses = agent.run_top_n_pipeline(db, [SOURCE], top_n=3)
+
+        assert [r.rfp_summary.id for r in responses] == ["N-RFP-3", "N-RFP-2", "N-RFP-1"]
+        assert all(name.startswith("pipeline") for name in threads)
+        for response in responses:
+            quantity = response.technical_table[0].quantity_m
+            assert [row.selected_sku for row in response.pricing_table.rows] == ["N-CU-16", "N-CU-16"]
+            assert response.pricing_table.total_material_cost == 2 * quantity * 10.0
+
+        monkeypatch.undo()
+        single = agent.run_full_pipeline(db, [SOURCE])
+        assert single.model_dump() == responses[0].model_dump()
+    finally:
+        db.close()
+        engine.dispose()
+        invalidate_catalog()
+        invalidate_price_book()
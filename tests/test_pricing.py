@@ -0,0 +1,200 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from app.db import models, price_book, repositories
+from app.domain.agents.pricing_agent import PricingAgent, allocate_pro_rata
+from app.models.schemas import LineItemMatch, SpecMatchEntry
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _prices(session_factory):
+    with session_factory() as db:
+        db.add_all([
+            models.SkuPrice(sku="PR-1", unit_price=10.0),
+            models.SkuPrice(sku="PR-2", unit_price=2.5),
+            models.TestPrice(test_code="HV", price=100.0),
+            models.TestPrice(test_code="IR", price=50.0),
+        ])
+        db.commit()
+
+
+def _line(line_id: int, sku: str, qty: float) -> LineItemMatch:
+    entry = SpecMatchEntry(sku=sku, name=sku, spec_match_percent=100.0, specs={})
+    return LineItemMatch(
+        line_id=line_id, description=f"Line {line_id}", quantity_m=qty, top_3_matches=[entry], selected_sku=entry
+    )
+
+
+def test_price_rfp_uses_constant_number_of_queries(db_engine, db):
+    price_book.invalidate_price_book()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    try:
+        rfp = models.RFP(external_id="PR-RFP", title="t", source_url="u", due_date=date(2030, 1, 1))
+        rfp.tests = [models.RFPTest(test_code="HV"), models.RFPTest(test_code="IR"), models.RFPTest(test_code="XX")]
+        db.add(rfp)
+        db.commit()
+        tests = list(rfp.tests)
+
+        event.listen(db_engine, "before_cursor_execute", listener)
+        small = PricingAgent().price_rfp(db, [_line(1, "PR-1", 100)], tests)
+        small_queries = len(statements)
+        statements.clear()
+
+        table = [_line(i, ["PR-1", "PR-2", "MISSING"][i % 3], 10 * i) for i in range(1, 61)]
+        summary = PricingAgent().price_rfp(db, table, tests)
+        # Cold price book: both tables loaded once; warm: no queries at all
+        assert small_queries == 2
+        assert statements == []
+    finally:
+        event.remove(db_engine, "before_cursor_execute", listener)
+
+    assert small.rows[0].unit_price == 10.0
+    assert small.rows[0].tests_cost == 150.0
+    assert small.grand_total == 1150.0
+
+    by_line = {row.line_id: row for row in summary.rows}
+    assert by_line[1].unit_price == 2.5 and by_line[1].material_cost == 25.0
+    assert by_line[2].unit_price == 0.0
+    assert by_line[3].unit_price == 10.0 and by_line[3].total_cost == 450.0
+    assert summary.total_tests_cost == 60 * 150.0
+
+
+def test_rfp_level_test_charges_are_counted_once(db):
+    price_book.invalidate_price_book()
+    rfp = models.RFP(external_id="PR-ALLOC", title="t", source_url="u", due_date=date(2030, 1, 1))
+    rfp.tests = [models.RFPTest(test_code="HV"), models.RFPTest(test_code="IR")]
+    db.add(rfp)
+    db.commit()
+    tests = list(rfp.tests)
+    table = [_line(1, "PR-1", 100), _line(2, "PR-2", 200), _line(3, "PR-1", 0)]
+    agent = PricingAgent()
+
+    summary = agent.price_rfp(db, table, tests, allocation="summary")
+    assert [row.tests_cost for row in summary.rows] == [0.0, 0.0, 0.0]
+    assert [(c.code, c.amount) for c in summary.rfp_charges] == [("HV", 100.0), ("IR", 50.0)]
+    assert summary.total_tests_cost == 150.0
+    assert summary.grand_total == 1000.0 + 500.0 + 150.0
+
+    by_qty = agent.price_rfp(db, table, tests, allocation="pro_rata_quantity")
+    assert [row.tests_cost for row in by_qty.rows] == [50.0, 100.0, 0.0]
+    assert by_qty.grand_total == summary.grand_total
+
+    by_material = agent.price_rfp(db, table, tests, allocation="pro_rata_material")
+    assert [row.tests_cost for row in by_material.rows] == [100.0, 50.0, 0.0]
+    assert [row.total_cost for row in by_material.rows] == [1100.0, 550.0, 0.0]
+
+    legacy = agent.price_rfp(db, table, tests, allocation="per_line")
+    assert legacy.total_tests_cost == 3 * 150.0
+
+
+def test_allocate_pro_rata_preserves_total():
+    shares = allocate_pro_rata(100.0, np.array([1.0, 1.0, 1.0]))
+    assert shares.tolist() == [33.34, 33.33, 33.33]
+    assert allocate_pro_rata(10.0, np.zeros(4)).tolist() == [2.5, 2.5, 2.5, 2.5]
+
+
+def test_price_book_write_through_and_ttl(db, monkeypatch):
+    price_book.invalidate_price_book()
+    try:
+        book = price_book.get_price_book(db)
+        assert book.sku_prices["PR-1"] == 10.0
+
+        repositories.update_sku_price(db, "PR-NEW", 7.0)
+        db.rollback()
+        assert "PR-NEW" not in price_book.get_price_book(db).sku_prices
+
+        repositories.update_sku_price(db, "PR-NEW", 7.0)
+        db.commit()
+        updated = price_book.get_price_book(db)
+        assert updated.sku_prices["PR-NEW"] == 7.0
+        assert updated.loaded_at == book.loaded_at  # applied in place, not reloaded
+        assert "PR-NEW" not in book.sku_prices
+
+        # Written behind the API's back: visible once the TTL expires
+        db.query(models.SkuPrice).filter_by(sku="PR-NEW").update({"unit_price": 8.0})
+        db.commit()
+        assert price_book.get_price_book(db).sku_prices["PR-NEW"] == 7.0
+        monkeypatch.setattr(price_book.time, "monotonic", lambda: book.loaded_at + 10_000)
+        assert price_book.get_price_book(db).sku_prices["PR-NEW"] == 8.0
+    finally:
+        db.query(models.SkuPrice).filter_by(sku="PR-NEW").delete()
+        db.commit()
+        price_book.invalidate_price_book()
+
+
+def _alternatives(line_id: int, qty: float, alternatives) -> LineItemMatch:
+    entries = [SpecMatchEntry(sku=sku, name=sku, spec_match_percent=pct, specs={}) for sku, pct in alternatives]
+    return LineItemMatch(
+        line_id=line_id, description=f"Line {line_id}", quantity_m=qty, top_3_matches=entries, selected_sku=entries[0]
+    )
+
+
+def test_what_if_picks_cheapest_alternative_per_threshold(db):
+    price_book.invalidate_price_book()
+    try:
+        db.add_all([models.SkuPrice(sku="WI-A", unit_price=8.0), models.SkuPrice(sku="WI-B", unit_price=5.0)])
+        db.commit()
+        table = [
+            # PR-1 @ 10 is the best match, WI-B @ 5 the cheapest; UNPRICED is never chosen
+            _alternatives(1, 10, [("PR-1", 100.0), ("WI-A", 83.33), ("WI-B", 66.67), ("UNPRICED", 50.0)]),
+            _alternatives(2, 100, [("PR-2", 83.33), ("WI-B", 83.33)]),
+        ]
+        scenarios = PricingAgent().what_if(db, table, [0, 70, 90, 100.5])
+    finally:
+        db.query(models.SkuPrice).filter(models.SkuPrice.sku.in_(["WI-A", "WI-B"])).delete()
+        db.commit()
+        price_book.invalidate_price_book()
+
+    assert [[row.selected_sku for row in s.rows] for s in scenarios] == [
+        ["WI-B", "PR-2"], ["WI-A", "PR-2"], ["PR-1"], [],
+    ]
+    assert [s.total_material_cost for s in scenarios] == [300.0, 330.0, 100.0, 0.0]
+    assert scenarios[1].feasible and scenarios[1].average_spec_match == 83.33
+    assert not scenarios[2].feasible and scenarios[2].infeasible_lines == [2]
+    assert scenarios[3].infeasible_lines == [1, 2]
+
+
+def test_price_rfp_as_of_uses_price_history(db):
+    price_book.invalidate_price_book()
+    try:
+        db.add_all([
+            models.SkuPrice(sku="HIST-1", unit_price=30.0),
+            models.SkuPriceHistory(sku="HIST-1", unit_price=10.0, effective_from=date(2024, 1, 1)),
+            models.SkuPriceHistory(sku="HIST-1", unit_price=20.0, effective_from=date(2024, 6, 1)),
+            models.SkuPriceHistory(sku="HIST-1", unit_price=30.0, effective_from=date(2025, 1, 1)),
+        ])
+        db.commit()
+
+        lookup = repositories.get_sku_prices_as_of
+        assert lookup(db, ["HIST-1", "PR-1", "NOPE"], date(2024, 3, 1)) == {"HIST-1": 10.0, "PR-1": 10.0}
+        assert lookup(db, ["HIST-1"], date(2024, 6, 1)) == {"HIST-1": 20.0}
+        # Before the first entry: the earliest known price, not today's
+        assert lookup(db, ["HIST-1"], date(2023, 1, 1)) == {"HIST-1": 10.0}
+
+        table = [_line(1, "HIST-1", 10)]
+        old = PricingAgent().price_rfp(db, table, [], as_of=date(2024, 7, 1))
+        assert old.rows[0].unit_price == 20.0 and old.prices_as_of == date(2024, 7, 1)
+        assert PricingAgent().price_rfp(db, table, []).rows[0].unit_price == 30.0
+
+        # Every write is recorded with its effective date
+        repositories.update_sku_price(db, "HIST-1", 40.0)
+        db.commit()
+        assert lookup(db, ["HIST-1"], date.today()) == {"HIST-1": 40.0}
+        assert lookup(db, ["HIST-1"], date(2024, 7, 1)) == {"HIST-1": 20.0}
+
+        # A SKU priced before history was kept: its first change records the old price too
+        db.add(models.SkuPrice(sku="HIST-2", unit_price=5.0))
+        db.commit()
+        repositories.update_sku_price(db, "HIST-2", 7.0)
+        db.commit()
+        assert lookup(db, ["HIST-2"], date.today() - timedelta(days=1)) == {"HIST-2": 5.0}
+        assert lookup(db, ["HIST-2"], date.today()) == {"HIST-2": 7.0}
+    finally:
+        db.query(models.SkuPriceHistory).delete()
+        db.query(models.SkuPrice).filter_by(sku="HIST-1").delete()
+        db.commit()
+        price_book.invalidate_price_book()
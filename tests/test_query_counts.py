@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app.db import models, repositories
+from app.domain.agents.sales_agent import SalesAgent
+
+SOURCE = "http://queries.test"
+
+
+def _add_rfps(db, start: int, count: int) -> None:
+    for n in range(start, start + count):
+        rfp = models.RFP(
+            external_id=f"Q-RFP-{n}", title=f"RFP {n}", source_url=SOURCE, due_date=date.today() + timedelta(days=20)
+        )
+        rfp.line_items = [
+            models.RFPLineItem(
+                line_no=i, description=f"line {i}", quantity_m=100, conductor="copper", insulation="XLPE",
+                voltage_kv=1.1, cores=4, size_sqmm=16, armoured=True,
+            )
+            for i in range(1, 4)
+        ]
+        rfp.tests = [models.RFPTest(test_code="HV")]
+        db.add(rfp)
+    db.commit()
+
+
+def _count_scan_queries(engine, db) -> tuple[int, int, int]:
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    db.expire_all()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        # The first scan scores the new RFPs, the second reads persisted scores
+        SalesAgent().scan_rfps(db, [SOURCE])
+        cold = len(statements)
+        results = SalesAgent().scan_rfps(db, [SOURCE])
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return len(results), cold, len(statements) - cold
+
+
+def test_scan_costs_constant_number_of_queries(db_engine, db):
+    _add_rfps(db, 0, 2)
+
+    small = _count_scan_queries(db_engine, db)
+    _add_rfps(db, 2, 20)
+    large = _count_scan_queries(db_engine, db)
+
+    assert small[0] == 2 and large[0] == 22
+    # Scoring is set-based, whatever the number of RFPs
+    assert small[1] == large[1]
+    # Warm: unscored check, stale time check, one ranked SELECT
+    assert small[2] == large[2] == 3
+
+
+def test_rfp_load_strategies(db_engine, db):
+    _add_rfps(db, 100, 3)
+    ids = ["Q-RFP-100", "Q-RFP-101", "Q-RFP-102"]
+    for strategy in ("selectin", "joined"):
+        db.expire_all()
+        rfps = repositories.get_rfps_by_external_ids(db, ids, load=("line_items", "tests"), strategy=strategy)
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db_engine, "before_cursor_execute", listener)
+        try:
+            assert sorted(len(rfp.line_items) + len(rfp.tests) for rfp in rfps) == [4, 4, 4]
+        finally:
+            event.remove(db_engine, "before_cursor_execute", listener)
+        assert statements == []
+
+    rfp = repositories.get_rfp_by_external_id(db, "Q-RFP-101", load=("tests",), strategy="joined")
+    assert [t.test_code for t in rfp.tests] == ["HV"]
+
+
+def test_scan_alignment_is_computed_in_sql_with_canonical_specs(db):
+    db.add(models.Product(
+        sku="Q-AL", name="Al", category="Power", conductor="Aluminium", insulation="XLPE",
+        voltage_kv=1.1, cores=4, size_sqmm=16, application="feeder", armoured=True,
+    ))
+    rfp = models.RFP(
+        external_id="Q-ALIGN", title="Align", source_url="http://align.test", due_date=date.today() + timedelta(days=40)
+    )
+    specs = [("Al", " Cross-Linked Polyethylene"), ("aluminum", "xlpe"), ("gold", "paper"), ("copper", "pvc")]
+    rfp.line_items = [
+        models.RFPLineItem(
+            line_no=i, description=f"L{i}", quantity_m=1, conductor=conductor, insulation=insulation,
+            voltage_kv=1.1, cores=4, size_sqmm=16, armoured=True,
+        )
+        for i, (conductor, insulation) in enumerate(specs, start=1)
+    ]
+    empty = models.RFP(
+        external_id="Q-EMPTY", title="Empty", source_url="http://align.test", due_date=date.today() + timedelta(days=40)
+    )
+    db.add_all([rfp, empty])
+    db.commit()
+
+    row, empty_row = repositories.get_rfp_alignment(db, ["http://align.test"], 3)
+    assert (row.external_id, row.total_lines, row.matched_lines) == ("Q-ALIGN", 4, 2)
+    assert row.short_scope == "L1, L2, L3, L4"
+    assert (empty_row.total_lines, empty_row.matched_lines, empty_row.short_scope) == (0, 0, "")
+
+    summaries = {s.id: s for s in SalesAgent().scan_rfps(db, ["http://align.test"])}
+    assert summaries["Q-ALIGN"].product_alignment_score == 50.0
+    assert summaries["Q-EMPTY"].product_alignment_score == 0.0
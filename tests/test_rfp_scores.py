@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from app.db import models
+from app.domain import rfp_scoring
+from app.domain.agents.sales_agent import SalesAgent
+
+SOURCE = "http://scores.test"
+
+
+def _add_rfp(db, external_id: str, days: int, specs) -> models.RFP:
+    rfp = models.RFP(
+        external_id=external_id, title=external_id, source_url=SOURCE, due_date=date.today() + timedelta(days=days)
+    )
+    rfp.line_items = [
+        models.RFPLineItem(
+            line_no=i, description=f"L{i}", quantity_m=1, conductor=conductor, insulation=insulation,
+            voltage_kv=1.1, cores=4, size_sqmm=16, armoured=True,
+        )
+        for i, (conductor, insulation) in enumerate(specs, start=1)
+    ]
+    db.add(rfp)
+    db.commit()
+    return rfp
+
+
+def _score(db, rfp: models.RFP) -> models.RFPScore:
+    db.expire_all()
+    return db.get(models.RFPScore, rfp.id)
+
+
+def test_scores_are_persisted_and_refreshed_incrementally(db):
+    copper = _add_rfp(db, "S-CU", 30, [("copper", "XLPE"), ("copper", "PVC")])
+    alu = _add_rfp(db, "S-AL", 60, [("aluminium", "XLPE")])
+
+    # RFPs written directly are scored on the first scan
+    assert _score(db, copper) is None
+    summaries = SalesAgent().scan_rfps(db, [SOURCE])
+    assert [s.id for s in summaries] == ["S-AL", "S-CU"]
+    assert _score(db, copper).product_alignment_score == 0.0
+
+    db.add(models.Product(
+        sku="S-P1", name="Cu", category="Power", conductor="Cu", insulation="xlpe",
+        voltage_kv=1.1, cores=4, size_sqmm=16, application="feeder", armoured=True,
+    ))
+    db.flush()
+    # Only RFPs with a matching canonical pair are rescored
+    assert rfp_scoring.refresh_scores_for_specs(db, [("Cu", "xlpe")]) == 1
+    db.commit()
+
+    assert _score(db, copper).product_alignment_score == 50.0
+    assert _score(db, copper).score == round(0.6 * 50.0 + 0.4 * 100.0, 2)
+    assert _score(db, alu).product_alignment_score == 0.0
+    assert [s.id for s in SalesAgent().scan_rfps(db, [SOURCE])] == ["S-CU", "S-AL"]
+
+
+def test_time_component_rolls_over_daily(db):
+    rfp = _add_rfp(db, "S-TIME", 12, [("gold", "paper")])
+    rfp_scoring.ensure_scores(db)
+    assert _score(db, rfp).time_readiness_score == 40.0
+
+    # Six days later the RFP is due in under a week
+    later = date.today() + timedelta(days=6)
+    rfp_scoring.ensure_scores(db, today=later)
+    row = _score(db, rfp)
+    assert (row.time_readiness_score, row.score, row.scored_on) == (0.0, 0.0, later)
+
+
+def test_scores_are_deleted_with_their_rfp(db):
+    rfp = _add_rfp(db, "S-GONE", 40, [])
+    rfp_scoring.ensure_scores(db)
+    assert _score(db, rfp) is not None
+
+    db.delete(rfp)
+    db.commit()
+    assert db.scalars(select(models.RFPScore).where(models.RFPScore.rfp_id == rfp.id)).first() is None
+
+
+def test_refresh_upserts_rows_written_concurrently(session_factory, db):
+    rfp = _add_rfp(db, "S-RACE", 40, [])
+    # Another request scored the RFP between our unscored check and our insert
+    other = session_factory()
+    other.add(models.RFPScore(
+        rfp_id=rfp.id, total_lines=0, matched_lines=0, short_scope="", product_alignment_score=0.0,
+        time_readiness_score=0.0, score=0.0, scored_on=date.today() - timedelta(days=1),
+    ))
+    other.commit()
+    other.close()
+
+    assert rfp_scoring.refresh_rfp_scores(db, [rfp.id]) == 1
+    db.commit()
+    row = _score(db, rfp)
+    assert (row.time_readiness_score, row.scored_on) == (100.0, date.today())
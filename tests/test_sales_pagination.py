@@ -0,0 +1,53 @@
+import json
+from datetime import date, timedelta
+
+from app.core.config import get_settings
+from app.db import models
+
+settings = get_settings()
+SOURCE = "http://pages.test"
+
+
+def _seed(db):
+    db.add(models.Product(
+        sku="PG-1", name="PG-1", category="Power", conductor="copper", insulation="XLPE",
+        voltage_kv=1.1, cores=4, size_sqmm=16, application="feeder", armoured=True,
+    ))
+    # Several RFPs share a score, so ties are broken by id across page boundaries
+    for n, (days, conductor) in enumerate([(40, "copper"), (40, "gold"), (20, "copper"), (40, "copper"),
+                                          (3, "copper"), (60, "gold"), (40, "copper")]):
+        rfp = models.RFP(
+            external_id=f"PG-{n}", title=f"RFP {n}", source_url=SOURCE, due_date=date.today() + timedelta(days=days)
+        )
+        rfp.line_items = [models.RFPLineItem(
+            line_no=1, description=f"line {n}", quantity_m=1, conductor=conductor, insulation="xlpe",
+            voltage_kv=1.1, cores=4, size_sqmm=16, armoured=True,
+        )]
+        db.add(rfp)
+    db.commit()
+
+
+def test_scan_pages_and_stream_cover_the_full_ranking(client, db):
+    _seed(db)
+    url = f"{settings.api_v1_prefix}/sales/scan"
+    full = client.get(url, params={"urls": SOURCE}).json()
+    assert len(full) == 7
+    assert "x-next-cursor" not in client.get(url, params={"urls": SOURCE}).headers
+
+    pages, cursor = [], None
+    while True:
+        params = {"urls": SOURCE, "limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, params=params)
+        pages.append(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [r["id"] for page in pages for r in page] == [r["id"] for r in full]
+
+    assert client.get(url, params={"urls": SOURCE, "cursor": "not-a-cursor"}).status_code == 400
+
+    response = client.get(f"{url}/stream", params={"urls": SOURCE})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(streamed, key=lambda r: (-r["score"], r["id"])) == full
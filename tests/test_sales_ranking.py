@@ -2,6 +2,7 @@ from datetime import date, timedelta
 from app.domain.agents.sales_agent import SalesAgent
 from app.db import models
 from app.db.session import engine
+from app.domain.catalog import invalidate_catalog
 from sqlalchemy.orm import Session
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -29,6 +30,8 @@ def test_sales_ranking_logic():
         )
         db.add(prod)
         db.commit()
+        # Products were written behind the API's back, drop the cached catalog
+        invalidate_catalog()
 
         # 3. Seed RFPs
         
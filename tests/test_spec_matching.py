@@ -0,0 +1,185 @@
+import random
+
+import numpy as np
+
+from app.domain.spec_ann import ApproximateSpecMatcher
+from app.domain.spec_index import SpecIndex
+from app.domain.spec_sharding import ShardedSpecMatcher
+from app.domain.spec_matching import (
+    SpecMatchCache,
+    SpecMatchEngine,
+    cached_top_k,
+    compute_spec_match,
+    requirement_signature,
+    top_k_indices,
+)
+
+CONDUCTORS = ["copper", "Copper", "aluminium", "aluminum"]
+INSULATIONS = ["XLPE", "xlpe", "PVC", "EPR"]
+
+
+def _random_specs(rng: random.Random) -> dict:
+    return {
+        "conductor": rng.choice(CONDUCTORS),
+        "insulation": rng.choice(INSULATIONS),
+        "voltage_kV": rng.choice([0.0, 0.65, 1.1, 1.2, 3.3, 11.0, 33.0]),
+        "cores": rng.choice([1, 2, 3, 3.5, 4, 3.7]),
+        "size_sqmm": rng.choice([0, 4, 4.4, 16, 17.5, 25, 95, 185, 240]),
+        "armoured": rng.choice([True, False]),
+    }
+
+
+def _random_catalog(rng: random.Random, size: int) -> list[dict]:
+    catalog = []
+    for i in range(size):
+        specs = _random_specs(rng)
+        specs["application"] = "feeder"
+        catalog.append({"sku": f"SKU-{i}", "name": f"Cable {i}", "category": "Power", "specs": specs})
+    return catalog
+
+
+def test_engine_scores_match_compute_spec_match():
+    rng = random.Random(7)
+    catalog = _random_catalog(rng, 300)
+    required = [_random_specs(rng) for _ in range(60)]
+    # values the catalog has never seen must simply not match
+    required.append({**required[0], "conductor": "gold", "insulation": "paper"})
+
+    matrix = SpecMatchEngine(catalog).score_matrix(required)
+
+    assert matrix.shape == (len(required), len(catalog))
+    for i, req in enumerate(required):
+        expected = [compute_spec_match(req, p["specs"]) for p in catalog]
+        assert matrix[i].tolist() == expected
+
+
+def test_engine_handles_empty_inputs():
+    engine = SpecMatchEngine([])
+    assert engine.score_matrix([_random_specs(random.Random(1))]).shape == (1, 0)
+    assert SpecMatchEngine(_random_catalog(random.Random(2), 5)).score_matrix([]).shape == (0, 5)
+
+
+def test_top_k_indices_matches_stable_sort():
+    rng = random.Random(11)
+    for n in (1, 5, 50, 400):
+        # few distinct values -> lots of ties
+        scores = np.array([rng.choice([0.0, 16.67, 50.0, 83.33, 100.0]) for _ in range(n)])
+        for k in (1, 3, 10, n + 2):
+            expected = sorted(range(n), key=lambda i: -scores[i])[:k]
+            assert top_k_indices(scores, k).tolist() == expected
+
+
+def test_engine_top_k_matches_full_ranking():
+    rng = random.Random(3)
+    catalog = _random_catalog(rng, 500)
+    required = [_random_specs(rng) for _ in range(150)]
+    engine = SpecMatchEngine(catalog)
+    matrix = engine.score_matrix(required)
+
+    ranked = engine.top_k(required, 4, chunk_size=32)
+
+    assert len(ranked) == len(required)
+    for row, (indices, scores) in zip(matrix, ranked):
+        expected = sorted(range(len(catalog)), key=lambda i: -row[i])[:4]
+        assert indices.tolist() == expected
+        assert scores.tolist() == row[expected].tolist()
+
+
+def test_spec_index_top_k_matches_engine():
+    rng = random.Random(5)
+    catalog = _random_catalog(rng, 800)
+    # values right at the 10% tolerance edges, zero and negative candidates
+    for product, (voltage, size) in zip(catalog, [(1.0, 10.0), (1.2222222222222223, 9.0), (-1.0, 0.0), (1.21, 11.11)]):
+        product["specs"]["voltage_kV"], product["specs"]["size_sqmm"] = voltage, size
+    required = [_random_specs(rng) for _ in range(200)]
+    required += [
+        {**required[0], "voltage_kV": 1.1, "size_sqmm": 10.0},
+        {**required[1], "voltage_kV": 0.0, "conductor": "gold"},
+        {"conductor": "gold", "insulation": "paper", "voltage_kV": -5.0, "cores": 99, "size_sqmm": 0.1, "armoured": False},
+    ]
+
+    engine = SpecMatchEngine(catalog)
+    index = SpecIndex(catalog)
+    for k in (1, 3, 10, 900):
+        expected = engine.top_k(required, k)
+        actual = index.top_k(required, k)
+        for (exp_idx, exp_scores), (idx, scores) in zip(expected, actual):
+            assert idx.tolist() == exp_idx.tolist()
+            assert scores.tolist() == exp_scores.tolist()
+
+
+def test_cached_top_k_reuses_repeated_requirements():
+    rng = random.Random(9)
+    catalog = _random_catalog(rng, 200)
+    engine = SpecMatchEngine(catalog)
+    base = _random_specs(rng)
+    # same requirement spelled differently (case, int vs float)
+    variant = {**base, "conductor": base["conductor"].upper(), "cores": float(base["cores"])}
+    other = _random_specs(rng)
+    cache = SpecMatchCache(maxsize=2)
+
+    first = cached_top_k(engine, [base, variant, other], 3, catalog_version=1, cache=cache)
+    assert cache.stats()["size"] == 2
+    expected = engine.top_k([base, other], 3)
+    for (idx, scores), (exp_idx, exp_scores) in zip(first, [expected[0], expected[0], expected[1]]):
+        assert idx.tolist() == exp_idx.tolist() and scores.tolist() == exp_scores.tolist()
+
+    cache.hits = cache.misses = 0
+    cached_top_k(engine, [variant], 3, catalog_version=1, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+    # a new catalog version or a different k never reuses old entries
+    cached_top_k(engine, [variant], 3, catalog_version=2, cache=cache)
+    cached_top_k(engine, [variant], 5, catalog_version=2, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.stats()["size"] == 2  # LRU bound
+
+
+def test_sharded_matcher_matches_engine():
+    rng = random.Random(13)
+    catalog = _random_catalog(rng, 1000)
+    required = [_random_specs(rng) for _ in range(40)]
+    engine = SpecMatchEngine(catalog)
+    sharded = ShardedSpecMatcher(catalog, workers=3, min_size=0)
+    try:
+        for k in (1, 3, 1200):
+            expected = engine.top_k(required, k)
+            actual = sharded.top_k(required, k, chunk_size=16)
+            for (exp_idx, exp_scores), (idx, scores) in zip(expected, actual):
+                assert idx.tolist() == exp_idx.tolist()
+                assert scores.tolist() == exp_scores.tolist()
+    finally:
+        sharded.close()
+
+
+def test_ann_matcher_rescores_exactly_and_extends_incrementally():
+    rng = random.Random(17)
+    catalog = _random_catalog(rng, 400)
+    # requirements copied from catalog SKUs always have a perfect candidate
+    required = [{k: v for k, v in p["specs"].items() if k != "application"} for p in catalog[::40]]
+    engine = SpecMatchEngine(catalog)
+    ann = ApproximateSpecMatcher(catalog, n_candidates=16)
+
+    for req, (idx, scores), (_, exact) in zip(required, ann.top_k(required, 3), engine.top_k(required, 3)):
+        assert scores.tolist() == [compute_spec_match(req, catalog[i]["specs"]) for i in idx]
+        assert scores[0] == exact[0]
+
+    extra = _random_catalog(random.Random(19), 50)
+    extended = ann.extended(extra)
+    rebuilt = ApproximateSpecMatcher(catalog + extra, n_candidates=16)
+    assert extended.size == 450 and ann.size == 400
+    for (idx, scores), (exp_idx, exp_scores) in zip(extended.top_k(required, 3), rebuilt.top_k(required, 3)):
+        assert scores.tolist() == exp_scores.tolist()
+        assert idx.tolist() == exp_idx.tolist()
+
+
+def test_spelling_variants_match_in_every_path():
+    required = {"conductor": "Aluminum", "insulation": " Cross-Linked Polyethylene", "voltage_kV": 1.1,
+                "cores": 4, "size_sqmm": 16, "armoured": True}
+    product = {"sku": "AL-1", "name": "Al cable", "category": "Power", "specs": {
+        "conductor": "aluminium", "insulation": "XLPE", "voltage_kV": 1.1, "cores": 4, "size_sqmm": 16,
+        "application": "feeder", "armoured": True}}
+
+    assert compute_spec_match(required, product["specs"]) == 100.0
+    assert SpecMatchEngine([product]).score_matrix([required]).tolist() == [[100.0]]
+    assert requirement_signature(required) == requirement_signature({**required, "conductor": "al"})
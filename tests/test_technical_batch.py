@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+from app.core.config import get_settings
+from app.db import models
+from app.domain.agents.technical_agent import TechnicalAgent
+from app.domain.catalog import invalidate_catalog
+
+settings = get_settings()
+
+
+def _seed(db):
+    for sku, conductor, size in [("B-CU-16", "copper", 16), ("B-CU-25", "copper", 25), ("B-AL-95", "aluminium", 95)]:
+        db.add(models.Product(
+            sku=sku, name=sku, category="Power", conductor=conductor, insulation="XLPE",
+            voltage_kv=1.1, cores=4, size_sqmm=size, application="feeder", armoured=True,
+        ))
+    for n, (ext_id, days) in enumerate([("B-RFP-1", 20), ("B-RFP-2", 40), ("B-RFP-3", 400)]):
+        rfp = models.RFP(external_id=ext_id, title=ext_id, source_url="http://batch.test", due_date=date.today() + timedelta(days=days))
+        db.add(rfp)
+        db.flush()
+        for line_no, size in enumerate([16, 95, 25][: n + 1], start=1):
+            db.add(models.RFPLineItem(
+                rfp_id=rfp.id, line_no=line_no, description=f"line {line_no}", quantity_m=100,
+                conductor="copper", insulation="XLPE", voltage_kv=1.1, cores=4, size_sqmm=size, armoured=True,
+            ))
+    db.commit()
+    invalidate_catalog()
+
+
+def test_match_batch_matches_process_rfp(client, db):
+    _seed(db)
+    try:
+        url = f"{settings.api_v1_prefix}/technical/match-batch"
+
+        response = client.post(url, json={"external_ids": ["B-RFP-2", "B-RFP-1", "MISSING"], "top_k": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["rfp_id"] for r in data["results"]] == ["B-RFP-1", "B-RFP-2"]
+        assert data["not_found"] == ["MISSING"]
+
+        agent = TechnicalAgent()
+        for result in data["results"]:
+            rfp = db.query(models.RFP).filter_by(external_id=result["rfp_id"]).one()
+            expected = [m.model_dump(mode="json") for m in agent.process_rfp(db, rfp, top_k=2)]
+            assert result["technical_table"] == expected
+
+        response = client.post(url, json={"due_within_months": 3, "urls": ["http://batch.test"]})
+        assert [r["rfp_id"] for r in response.json()["results"]] == ["B-RFP-1", "B-RFP-2"]
+
+        assert client.post(url, json={}).status_code == 400
+        assert client.post(url, json={"due_within_months": -1}).status_code == 422
+    finally:
+        invalidate_catalog()
@@ -18,7 +18,10 @@ modules_to_check = [
     "app.api.routers.sales",
     "app.api.routers.pipeline",
     "app.api.routers.inventory",
+    "app.api.routers.technical",
+    "app.api.routers.pricing",
     "app.core.scraper_utils",
+    "app.core.executors",
     "app.db.session",
 ]
 